@@ -169,7 +169,6 @@ setup_log_rotation() {
     
     cat > /etc/logrotate.d/gateway-monitoring << 'EOF'
 /var/log/telegram_notifier.log
-/var/log/tailscale_monitor.log
 /var/log/system_watchdog.log
 /var/log/health_monitor.log
 /var/log/setup_monitoring.log
@@ -185,7 +184,6 @@ setup_log_rotation() {
     postrotate
         # Signal services to reopen log files if needed
         systemctl reload-or-restart telegram-notifier.service >/dev/null 2>&1 || true
-        systemctl reload-or-restart tailscale-monitor.service >/dev/null 2>&1 || true
         systemctl reload-or-restart system-watchdog.service >/dev/null 2>&1 || true
         systemctl reload-or-restart health-monitor.service >/dev/null 2>&1 || true
     endscript
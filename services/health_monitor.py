@@ -8,6 +8,7 @@ Performs comprehensive health checks and generates reports.
 """
 
 import os
+import re
 import sys
 import time
 import json
@@ -15,21 +16,84 @@ import logging
 import subprocess
 import threading
 import signal
+import socket
+import struct
+import fcntl
+import array
+import bisect
+import select
 import psutil
 import requests
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    sys.path.insert(0, '/opt/gateway/services')
+    from telegram_notifier import TelegramNotifier
+except ImportError:
+    TelegramNotifier = None
+
 # Configuration
 CONFIG_PATH = "/opt/gateway/config/monitoring.conf"
 LOG_PATH = "/var/log/health_monitor.log"
 REPORT_PATH = "/tmp/health_reports"
+HEALTH_HISTORY_SIZE = 100
+UINT64_MAX = 2**64 - 1
+VOLTAGE_COMPONENTS = ['core', 'sdram_c', 'sdram_i', 'sdram_p']
+CLOCK_DOMAINS = ['arm', 'core', 'h264', 'isp', 'v3d', 'uart', 'pwm', 'emmc', 'pixel', 'vec', 'hdmi', 'dpi']
+CLOCK_CACHE_TTL = 60  # seconds voltage/clock readings are reused between reports
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+SYSFS_CPU_TEMP = "/sys/class/thermal/thermal_zone0/temp"
+SYSFS_THROTTLED = "/sys/devices/platform/soc/soc:firmware/get_throttled"
+SYSFS_ARM_FREQ = "/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq"
+# Network ioctls (linux/sockios.h, linux/wireless.h)
+SIOCGIFFLAGS = 0x8913
+SIOCGIFADDR = 0x8915
+SIOCGIFNETMASK = 0x891B
+SIOCGIWESSID = 0x8B1B
+IFF_UP = 0x1
+IW_ESSID_MAX_SIZE = 32
+
+# KEY=value config lines; an inline '#' comment must be preceded by whitespace
+_CONFIG_LINE = re.compile(r'^\s*([A-Za-z_][A-Za-z0-9_]*)\s*=\s*(.*?)(?:\s+#.*)?\s*$')
+_CONFIG_BOOLEANS = {'true': True, 'false': False}
+
+# Health score tables: points for a reading below each threshold (last entry: at/above the highest one)
+TEMP_SCORE_THRESHOLDS = (75, 85, 90)
+TEMP_SCORE_POINTS = (15, 10, 5, 0)
+DISK_SCORE_THRESHOLDS = (70, 85, 95)
+DISK_SCORE_POINTS = (15, 10, 5, 0)
+
+# Compact connectivity history record (only what trend analysis needs)
+ConnectivitySample = namedtuple('ConnectivitySample', ['timestamp', 'ethernet', 'wifi', 'tailscale', 'internet'])
 
 class HealthMonitor:
     def __init__(self):
         self.config = self.load_config()
         self.running = True
-        self.health_history = []
+        self._stop_event = threading.Event()
+        self.health_history = deque(maxlen=HEALTH_HISTORY_SIZE)
+        self._sysfs_fds = {}
+        self._clock_cache = None
+        self._clock_cache_at = 0.0
+        self._mounts_file = None
+        self._mounts_poller = None
+        self._partitions_cache = None
+        self._notifier = None
+        psutil.cpu_percent(interval=None)  # Prime the baseline: later calls report usage since the previous one
+        self._health_interval = int(self.config.get('HEALTH_CHECK_INTERVAL', 300))
+        self._connectivity_interval = int(self.config.get('CONNECTIVITY_CHECK_INTERVAL', 30))
+        # Patterns applied to raw (bytes) command output in a single pass
+        self._re_default_gateway = re.compile(rb'^default via (\S+)', re.M)
+        self._re_rtt = re.compile(rb'^[^\n]*(?:round-trip|rtt)[^\n]*', re.M)
         self.setup_logging()
         os.makedirs(REPORT_PATH, exist_ok=True)
         
@@ -38,15 +102,13 @@ class HealthMonitor:
         config = {}
         try:
             with open(CONFIG_PATH, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        if value.lower() in ('true', 'false'):
-                            value = value.lower() == 'true'
-                        elif value.isdigit():
-                            value = int(value)
-                        config[key.strip()] = value
+                for match in filter(None, map(_CONFIG_LINE.match, f)):
+                    key, value = match.groups()
+                    try:
+                        value = int(value)
+                    except ValueError:
+                        value = _CONFIG_BOOLEANS.get(value.lower(), value)
+                    config[key] = value
         except Exception as e:
             logging.error(f"Error loading config: {e}")
             config = {
@@ -71,9 +133,12 @@ class HealthMonitor:
     def notify_telegram(self, message_type: str, **kwargs):
         """Send notification to Telegram service"""
         try:
-            sys.path.insert(0, '/opt/gateway/services')
-            from telegram_notifier import TelegramNotifier
-            notifier = TelegramNotifier()
+            if TelegramNotifier is None:
+                raise RuntimeError("telegram_notifier module not available")
+            # Created on first use and kept, so config is read once and rate-limit state persists
+            if self._notifier is None:
+                self._notifier = TelegramNotifier()
+            notifier = self._notifier
             
             if message_type == 'disconnection':
                 notifier.notify_disconnection(kwargs.get('connection_type', 'Unknown'))
@@ -84,10 +149,89 @@ class HealthMonitor:
         except Exception as e:
             logging.error(f"Failed to send Telegram notification: {e}")
             
-    def check_network_connectivity(self) -> Dict:
+    def get_interface_ipv4(self, ifname: str, with_prefix: bool = True) -> Optional[str]:
+        """IPv4 address of an UP interface via ioctl ('a.b.c.d/nn' like 'ip addr'), None if down/absent"""
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                ifreq = struct.pack('256s', ifname.encode()[:15])
+                flags = struct.unpack('H', fcntl.ioctl(sock, SIOCGIFFLAGS, ifreq)[16:18])[0]
+                if not flags & IFF_UP:
+                    return None
+                address = socket.inet_ntoa(fcntl.ioctl(sock, SIOCGIFADDR, ifreq)[20:24])
+                if not with_prefix:
+                    return address
+                netmask = struct.unpack('!I', fcntl.ioctl(sock, SIOCGIFNETMASK, ifreq)[20:24])[0]
+                return f"{address}/{bin(netmask).count('1')}"
+        except OSError:
+            return None
+            
+    def get_wifi_ssid(self, ifname: str) -> Optional[str]:
+        """SSID the interface is associated with via wireless-extensions ioctl, falling back to iwgetid"""
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                essid = array.array('B', bytes(IW_ESSID_MAX_SIZE + 1))
+                iwreq = struct.pack('16sPHH', ifname.encode()[:15], essid.buffer_info()[0], len(essid), 0).ljust(32, b'\0')
+                length = struct.unpack('H', fcntl.ioctl(sock, SIOCGIWESSID, iwreq)[16 + struct.calcsize('P'):][:2])[0]
+                return essid.tobytes()[:length].rstrip(b'\0').decode('utf-8', 'replace') or None
+        except OSError:
+            pass
+        try:
+            result = subprocess.run(['iwgetid', '-r'], capture_output=True, text=True, timeout=5)
+            if result.returncode == 0 and result.stdout.strip():
+                return result.stdout.strip()
+        except:
+            pass
+        return None
+        
+    def icmp_ping(self, host: str, timeout: float = 3) -> bool:
+        """Send one ICMP echo from this process (unprivileged ping socket, raw socket as root); falls back to 'ping'"""
+        try:
+            address = socket.gethostbyname(host)
+        except OSError:
+            return False
+        for sock_type in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+            try:
+                sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+            except OSError:
+                continue
+            with sock:
+                ident = os.getpid() & 0xFFFF
+                header = struct.pack('!BBHHH', 8, 0, 0, ident, 1)
+                payload = b'health_monitor'
+                packet = struct.pack('!BBHHH', 8, 0, self._icmp_checksum(header + payload), ident, 1) + payload
+                try:
+                    sock.sendto(packet, (address, 0))
+                    deadline = time.monotonic() + timeout
+                    while True:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or not select.select([sock], [], [], remaining)[0]:
+                            return False
+                        data, source = sock.recvfrom(1024)
+                        if sock_type == socket.SOCK_RAW:
+                            data = data[(data[0] & 0x0F) * 4:]  # Skip IP header
+                        if source[0] == address and data[:1] == b'\x00':  # Echo reply
+                            return True
+                except OSError:
+                    return False
+        try:
+            return subprocess.run(['ping', '-c', '1', '-W', str(int(timeout)), host],
+                                  capture_output=True, timeout=timeout + 7).returncode == 0
+        except:
+            return False
+            
+    @staticmethod
+    def _icmp_checksum(data: bytes) -> int:
+        if len(data) % 2:
+            data += b'\0'
+        total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+        total = (total >> 16) + (total & 0xFFFF)
+        total += total >> 16
+        return ~total & 0xFFFF
+        
+    def check_network_connectivity(self, timestamp: Optional[str] = None) -> Dict:
         """Check various network connectivity options"""
         connectivity = {
-            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'timestamp': timestamp or datetime.now(timezone.utc).isoformat(),
             'ethernet': False,
             'wifi': False,
             'tailscale': False,
@@ -96,55 +240,43 @@ class HealthMonitor:
         }
         
         try:
-            # Check Ethernet
-            result = subprocess.run(['ip', 'addr', 'show', 'eth0'], 
-                                  capture_output=True, text=True, timeout=5)
-            if 'UP' in result.stdout:
-                for line in result.stdout.split('\n'):
-                    if 'inet ' in line and not '127.0.0.1' in line:
-                        connectivity['ethernet'] = True
-                        connectivity['details']['ethernet_ip'] = line.strip().split()[1]
-                        break
+            # Check Ethernet (ioctl on the interface, no 'ip' process)
+            eth_ip = self.get_interface_ipv4('eth0')
+            if eth_ip:
+                connectivity['ethernet'] = True
+                connectivity['details']['ethernet_ip'] = eth_ip
             
             # Check WiFi
-            try:
-                result = subprocess.run(['iwgetid', '-r'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0 and result.stdout.strip():
-                    connectivity['wifi'] = True
-                    connectivity['details']['wifi_ssid'] = result.stdout.strip()
-            except:
-                pass
+            ssid = self.get_wifi_ssid('wlan0')
+            if ssid:
+                connectivity['wifi'] = True
+                connectivity['details']['wifi_ssid'] = ssid
             
-            # Check Tailscale
-            try:
-                result = subprocess.run(['tailscale', 'ip'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0 and result.stdout.strip():
-                    connectivity['tailscale'] = True
-                    connectivity['details']['tailscale_ip'] = result.stdout.strip()
-            except:
-                pass
+            # Check Tailscale (address of the tailscale0 interface)
+            tailscale_ip = self.get_interface_ipv4('tailscale0', with_prefix=False)
+            if tailscale_ip:
+                connectivity['tailscale'] = True
+                connectivity['details']['tailscale_ip'] = tailscale_ip
             
-            # Check Internet connectivity
+            # Check Internet connectivity (single in-process ICMP echo per host, all hosts in flight at once)
             test_hosts = ['8.8.8.8', '1.1.1.1', 'google.com']
-            for host in test_hosts:
-                try:
-                    result = subprocess.run(['ping', '-c', '1', '-W', '3', host], 
-                                          capture_output=True, text=True, timeout=10)
-                    if result.returncode == 0:
+            executor = ThreadPoolExecutor(max_workers=len(test_hosts))
+            try:
+                futures = [(host, executor.submit(self.icmp_ping, host, 3)) for host in test_hosts]
+                for host, future in futures:
+                    if future.result():
                         connectivity['internet'] = True
                         connectivity['details']['internet_test_host'] = host
                         break
-                except:
-                    continue
+            finally:
+                executor.shutdown(wait=False)
                     
         except Exception as e:
             connectivity['error'] = str(e)
             
         return connectivity
         
-    def check_service_status(self) -> Dict:
+    def check_service_status(self, timestamp: Optional[str] = None) -> Dict:
         """Check status of all critical services"""
         services = {
             'access_control.service': False,
@@ -156,41 +288,61 @@ class HealthMonitor:
         
         service_details = {}
         
-        for service in services.keys():
-            try:
-                result = subprocess.run(['systemctl', 'is-active', service], 
-                                      capture_output=True, text=True, timeout=5)
-                services[service] = result.stdout.strip() == 'active'
-                
-                # Get more details
-                result = subprocess.run(['systemctl', 'status', service], 
-                                      capture_output=True, text=True, timeout=5)
-                
-                # Extract memory usage if available
-                for line in result.stdout.split('\n'):
-                    if 'Memory:' in line:
-                        try:
-                            memory = line.split('Memory:')[1].strip()
-                            service_details[service] = {'memory': memory}
-                        except:
-                            pass
-                        break
-                        
-            except Exception as e:
-                logging.error(f"Error checking service {service}: {e}")
+        # One 'systemctl show' for all units; output is one KEY=value block per unit (in argument order), separated by blank lines
+        try:
+            result = subprocess.run(['systemctl', 'show', '--property=ActiveState,MemoryCurrent', '--'] + list(services.keys()),
+                                  capture_output=True, text=True, timeout=5)
+            for service, block in zip(services.keys(), result.stdout.strip().split('\n\n')):
+                properties = dict(line.split('=', 1) for line in block.splitlines() if '=' in line)
+                services[service] = properties.get('ActiveState') == 'active'
+                memory = properties.get('MemoryCurrent', '')
+                # Unset counters are reported as '[not set]' or as UINT64_MAX depending on the systemd version
+                if memory.isdigit() and int(memory) < UINT64_MAX:
+                    service_details[service] = {'memory': f"{int(memory) / (1024 * 1024):.1f}M"}
+        except Exception as e:
+            logging.error(f"Error checking services: {e}")
                 
         return {
-            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'timestamp': timestamp or datetime.now(timezone.utc).isoformat(),
             'services': services,
             'details': service_details,
             'healthy_count': sum(services.values()),
             'total_count': len(services)
         }
         
-    def check_hardware_health(self) -> Dict:
+    def read_sysfs(self, path: str) -> Optional[str]:
+        """Read a small sysfs attribute through a cached file descriptor (pread at offset 0); None if unavailable"""
+        fd = self._sysfs_fds.get(path)
+        if fd is None:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                fd = -1  # Not exposed on this kernel: don't retry every poll
+            self._sysfs_fds[path] = fd
+        if fd < 0:
+            return None
+        try:
+            return os.pread(fd, 64, 0).decode().strip() or None
+        except OSError:
+            return None
+            
+    def run_vcgencmd_batch(self, commands: List[str]) -> List[str]:
+        """Run several vcgencmd queries in one shell; returns one stripped output per command ('' on failure)"""
+        if not commands:
+            return []
+        script = '; echo ---; '.join(f'vcgencmd {command} 2>/dev/null' for command in commands)
+        try:
+            result = subprocess.run(['sh', '-c', script], capture_output=True, text=True, timeout=10)
+            outputs = [section.strip() for section in result.stdout.split('---')]
+        except Exception as e:
+            logging.error(f"Error running vcgencmd: {e}")
+            outputs = []
+        return (outputs + [''] * len(commands))[:len(commands)]
+        
+    def check_hardware_health(self, timestamp: Optional[str] = None) -> Dict:
         """Check hardware health metrics"""
         health = {
-            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'timestamp': timestamp or datetime.now(timezone.utc).isoformat(),
             'cpu_temperature': None,
             'throttling': {},
             'voltage': None,
@@ -199,18 +351,35 @@ class HealthMonitor:
         }
         
         try:
+            # Temperature, throttle flags and ARM clock from sysfs when exposed (plain file reads)
+            sysfs_temp = self.read_sysfs(SYSFS_CPU_TEMP)
+            sysfs_throttled = self.read_sysfs(SYSFS_THROTTLED)
+            sysfs_arm_freq = self.read_sysfs(SYSFS_ARM_FREQ)
+            if sysfs_temp:
+                health['cpu_temperature'] = int(sysfs_temp) / 1000
+            if sysfs_arm_freq:
+                health['clock_speeds']['arm'] = int(sysfs_arm_freq) * 1000  # kHz -> Hz, as vcgencmd
+                
+            # Voltages and clocks barely move on a headless gateway: reuse them for CLOCK_CACHE_TTL seconds
+            now = time.monotonic()
+            clocks_cached = self._clock_cache is not None and now - self._clock_cache_at < CLOCK_CACHE_TTL
+            
+            # Everything else (and the sysfs fallbacks) in a single vcgencmd shell invocation
+            commands = (([] if sysfs_temp else ['measure_temp']) +
+                        ([] if sysfs_throttled else ['get_throttled']))
+            if not clocks_cached:
+                commands += ([f'measure_volts {component}' for component in VOLTAGE_COMPONENTS] +
+                             [f'measure_clock {clock}' for clock in CLOCK_DOMAINS if not (clock == 'arm' and sysfs_arm_freq)])
+            outputs = dict(zip(commands, self.run_vcgencmd_batch(commands)))
+            
             # CPU Temperature
-            result = subprocess.run(['vcgencmd', 'measure_temp'], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                temp_str = result.stdout.strip().replace('temp=', '').replace("'C", '')
+            if outputs.get('measure_temp'):
+                temp_str = outputs['measure_temp'].replace('temp=', '').replace("'C", '')
                 health['cpu_temperature'] = float(temp_str)
                 
             # Throttling status
-            result = subprocess.run(['vcgencmd', 'get_throttled'], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                throttle_hex = result.stdout.strip().replace('throttled=', '')
+            throttle_hex = f"0x{int(sysfs_throttled, 16):x}" if sysfs_throttled else outputs.get('get_throttled', '').replace('throttled=', '')
+            if throttle_hex:
                 throttle_int = int(throttle_hex, 16)
                 health['throttling'] = {
                     'raw_value': throttle_hex,
@@ -221,39 +390,60 @@ class HealthMonitor:
                     'soft_temp_limit': bool(throttle_int & 0x8)
                 }
                 
-            # Voltage measurements
-            for component in ['core', 'sdram_c', 'sdram_i', 'sdram_p']:
-                try:
-                    result = subprocess.run(['vcgencmd', 'measure_volts', component], 
-                                          capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0:
-                        voltage_str = result.stdout.strip().replace('volt=', '').replace('V', '')
-                        if health['voltage'] is None:
-                            health['voltage'] = {}
-                        health['voltage'][component] = float(voltage_str)
-                except:
-                    pass
-                    
-            # Clock speeds
-            for clock in ['arm', 'core', 'h264', 'isp', 'v3d', 'uart', 'pwm', 'emmc', 'pixel', 'vec', 'hdmi', 'dpi']:
-                try:
-                    result = subprocess.run(['vcgencmd', 'measure_clock', clock], 
-                                          capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0:
-                        clock_str = result.stdout.strip().replace(f'frequency({clock})=', '')
-                        health['clock_speeds'][clock] = int(clock_str)
-                except:
-                    pass
+            if clocks_cached:
+                voltage, clock_speeds = self._clock_cache
+                health['voltage'] = dict(voltage) if voltage is not None else None
+                health['clock_speeds'].update(clock_speeds)
+            else:
+                # Voltage measurements
+                for component in VOLTAGE_COMPONENTS:
+                    try:
+                        output = outputs.get(f'measure_volts {component}')
+                        if output:
+                            voltage_str = output.replace('volt=', '').replace('V', '')
+                            if health['voltage'] is None:
+                                health['voltage'] = {}
+                            health['voltage'][component] = float(voltage_str)
+                    except:
+                        pass
+                        
+                # Clock speeds (the sysfs ARM frequency stays live and is not cached)
+                clock_speeds = {}
+                for clock in CLOCK_DOMAINS:
+                    try:
+                        output = outputs.get(f'measure_clock {clock}')
+                        if output:
+                            clock_str = output.replace(f'frequency({clock})=', '')
+                            clock_speeds[clock] = int(clock_str)
+                    except:
+                        pass
+                health['clock_speeds'].update(clock_speeds)
+                self._clock_cache = (dict(health['voltage']) if health['voltage'] is not None else None, clock_speeds)
+                self._clock_cache_at = now
                     
         except Exception as e:
             health['error'] = str(e)
             
         return health
         
-    def check_storage_health(self) -> Dict:
+    def get_partitions(self) -> List[tuple]:
+        """(mountpoint, fstype) of mounted partitions, re-enumerated only when the mount table changes"""
+        if self._mounts_poller is None:
+            try:
+                self._mounts_file = open(MOUNTINFO_PATH)
+                self._mounts_poller = select.poll()
+                # The kernel flags POLLPRI|POLLERR on this file whenever a mount/umount happens
+                self._mounts_poller.register(self._mounts_file, select.POLLPRI)
+            except (OSError, AttributeError):
+                self._mounts_poller = False
+        if self._partitions_cache is None or not self._mounts_poller or self._mounts_poller.poll(0):
+            self._partitions_cache = [(p.mountpoint, p.fstype) for p in psutil.disk_partitions()]
+        return self._partitions_cache
+        
+    def check_storage_health(self, timestamp: Optional[str] = None) -> Dict:
         """Check storage health and performance"""
         storage = {
-            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'timestamp': timestamp or datetime.now(timezone.utc).isoformat(),
             'disk_usage': {},
             'io_stats': {},
             'mount_points': [],
@@ -262,17 +452,17 @@ class HealthMonitor:
         
         try:
             # Disk usage for all mount points
-            for partition in psutil.disk_partitions():
+            for mountpoint, fstype in self.get_partitions():
                 try:
-                    usage = psutil.disk_usage(partition.mountpoint)
-                    storage['disk_usage'][partition.mountpoint] = {
+                    usage = psutil.disk_usage(mountpoint)
+                    storage['disk_usage'][mountpoint] = {
                         'total_gb': usage.total / (1024**3),
                         'used_gb': usage.used / (1024**3),
                         'free_gb': usage.free / (1024**3),
                         'percent': (usage.used / usage.total) * 100,
-                        'filesystem': partition.fstype
+                        'filesystem': fstype
                     }
-                    storage['mount_points'].append(partition.mountpoint)
+                    storage['mount_points'].append(mountpoint)
                 except:
                     pass
                     
@@ -291,8 +481,10 @@ class HealthMonitor:
             # Try to get SD card health (Raspberry Pi specific)
             try:
                 # Check for read-only filesystem (common SD card failure)
-                result = subprocess.run(['mount'], capture_output=True, text=True, timeout=5)
-                if 'ro,' in result.stdout or '(ro)' in result.stdout:
+                with open(MOUNTINFO_PATH, 'rb') as f:
+                    data = f.read()
+                # Field 6 of each mountinfo line holds the per-mount options ("ro,relatime", ...)
+                if any(line.split(b' ', 6)[5].split(b',')[0] == b'ro' for line in data.splitlines()):
                     storage['health_status'] = 'readonly_detected'
                 else:
                     storage['health_status'] = 'healthy'
@@ -320,18 +512,18 @@ class HealthMonitor:
             # Local network test (ping gateway)
             try:
                 gateway = subprocess.run(['ip', 'route', 'show', 'default'], 
-                                       capture_output=True, text=True, timeout=5)
-                if gateway.returncode == 0:
-                    gateway_ip = gateway.stdout.split()[2]
+                                       capture_output=True, timeout=5)
+                match = self._re_default_gateway.search(gateway.stdout) if gateway.returncode == 0 else None
+                if match:
+                    gateway_ip = match.group(1).decode()
                     result = subprocess.run(['ping', '-c', '3', '-W', '2', gateway_ip], 
-                                          capture_output=True, text=True, timeout=15)
+                                          capture_output=True, timeout=15)
                     if result.returncode == 0:
                         test_results['local_network'] = True
                         # Extract latency
-                        for line in result.stdout.split('\n'):
-                            if 'round-trip' in line or 'rtt' in line:
-                                test_results['latency_tests']['gateway'] = line.strip()
-                                break
+                        rtt = self._re_rtt.search(result.stdout)
+                        if rtt:
+                            test_results['latency_tests']['gateway'] = rtt.group(0).decode().strip()
             except:
                 pass
                 
@@ -343,22 +535,34 @@ class HealthMonitor:
             except:
                 pass
                 
-            # External connectivity test
+            # External connectivity test: ping all hosts in parallel, first host (in order) that answers wins
             external_hosts = ['8.8.8.8', '1.1.1.1', 'google.com']
+            procs = []
             for host in external_hosts:
                 try:
-                    result = subprocess.run(['ping', '-c', '3', '-W', '2', host], 
-                                          capture_output=True, text=True, timeout=15)
-                    if result.returncode == 0:
+                    procs.append((host, subprocess.Popen(['ping', '-c', '3', '-W', '2', host],
+                                                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)))
+                except:
+                    continue
+            deadline = time.monotonic() + 15
+            try:
+                for host, proc in procs:
+                    try:
+                        stdout, _ = proc.communicate(timeout=max(deadline - time.monotonic(), 0))
+                    except subprocess.TimeoutExpired:
+                        continue
+                    if proc.returncode == 0:
                         test_results['external_connectivity'] = True
                         # Extract latency
-                        for line in result.stdout.split('\n'):
-                            if 'round-trip' in line or 'rtt' in line:
-                                test_results['latency_tests'][host] = line.strip()
-                                break
+                        rtt = self._re_rtt.search(stdout)
+                        if rtt:
+                            test_results['latency_tests'][host] = rtt.group(0).decode().strip()
                         break
-                except:
-                    continue
+            finally:
+                for host, proc in procs:
+                    if proc.poll() is None:
+                        proc.kill()
+                    proc.communicate()
                     
             # Tailscale mesh connectivity
             try:
@@ -377,17 +581,26 @@ class HealthMonitor:
         
     def generate_health_report(self) -> Dict:
         """Generate comprehensive health report"""
+        # One timestamp for the whole report, shared by every section
+        timestamp = datetime.now(timezone.utc).isoformat()
         report = {
-            'timestamp': datetime.now(timezone.utc).isoformat(),
-            'system_info': self.get_system_info(),
-            'connectivity': self.check_network_connectivity(),
-            'services': self.check_service_status(),
-            'hardware': self.check_hardware_health(),
-            'storage': self.check_storage_health(),
-            'performance': self.get_performance_metrics(),
-            'overall_health': 'unknown'
+            'timestamp': timestamp,
+            'system_info': self.get_system_info()
         }
         
+        # Subsystem checks are independent and mostly wait on subprocess/network I/O: run them concurrently
+        checks = [
+            ('connectivity', self.check_network_connectivity, (timestamp,)),
+            ('services', self.check_service_status, (timestamp,)),
+            ('hardware', self.check_hardware_health, (timestamp,)),
+            ('storage', self.check_storage_health, (timestamp,)),
+            ('performance', self.get_performance_metrics, ())
+        ]
+        with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+            futures = {key: executor.submit(check, *args) for key, check, args in checks}
+        report.update({key: future.result() for key, future in futures.items()})
+        report['overall_health'] = 'unknown'
+        
         # Calculate overall health score
         health_score = 0
         max_score = 0
@@ -411,12 +624,8 @@ class HealthMonitor:
         max_score += 25
         hardware = report['hardware']
         temp = hardware.get('cpu_temperature')
-        if temp and temp < 75:
-            health_score += 15
-        elif temp and temp < 85:
-            health_score += 10
-        elif temp and temp < 90:
-            health_score += 5
+        if temp:
+            health_score += TEMP_SCORE_POINTS[bisect.bisect_right(TEMP_SCORE_THRESHOLDS, temp)]
             
         throttling = hardware.get('throttling', {})
         if not throttling.get('is_throttled', True):
@@ -429,12 +638,7 @@ class HealthMonitor:
         root_usage = disk_usage.get('/', {})
         if root_usage:
             usage_percent = root_usage.get('percent', 100)
-            if usage_percent < 70:
-                health_score += 15
-            elif usage_percent < 85:
-                health_score += 10
-            elif usage_percent < 95:
-                health_score += 5
+            health_score += DISK_SCORE_POINTS[bisect.bisect_right(DISK_SCORE_THRESHOLDS, usage_percent)]
                 
         if storage.get('health_status') == 'healthy':
             health_score += 10
@@ -479,16 +683,20 @@ class HealthMonitor:
         
     def get_performance_metrics(self) -> Dict:
         """Get performance metrics"""
+        # One call per psutil reader; each call re-reads its /proc file
+        memory = psutil.virtual_memory()
+        cpu_freq = psutil.cpu_freq()
+        disk_io = psutil.disk_io_counters()
         return {
-            'cpu_percent': psutil.cpu_percent(interval=1),
-            'memory_percent': psutil.virtual_memory().percent,
-            'cpu_freq': psutil.cpu_freq()._asdict() if psutil.cpu_freq() else {},
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'memory_percent': memory.percent,
+            'cpu_freq': cpu_freq._asdict() if cpu_freq else {},
             'cpu_times': psutil.cpu_times()._asdict(),
-            'memory_info': psutil.virtual_memory()._asdict(),
+            'memory_info': memory._asdict(),
             'swap_info': psutil.swap_memory()._asdict(),
             'process_count': len(psutil.pids()),
             'network_io': psutil.net_io_counters()._asdict(),
-            'disk_io': psutil.disk_io_counters()._asdict() if psutil.disk_io_counters() else {}
+            'disk_io': disk_io._asdict() if disk_io else {}
         }
         
     def save_health_report(self, report: Dict):
@@ -498,8 +706,16 @@ class HealthMonitor:
             filename = f"health_report_{timestamp}.json"
             filepath = os.path.join(REPORT_PATH, filename)
             
-            with open(filepath, 'w') as f:
-                json.dump(report, f, indent=2, default=str)
+            if ORJSON_AVAILABLE:
+                buf = orjson.dumps(report, option=orjson.OPT_INDENT_2, default=str)
+            else:
+                buf = json.dumps(report, indent=2, default=str).encode('utf-8')
+                
+            # Write to a temp file and rename so readers never see a partial report
+            tmp_path = filepath + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(buf)
+            os.replace(tmp_path, filepath)
                 
             logging.info(f"Health report saved: {filepath}")
             
@@ -514,44 +730,41 @@ class HealthMonitor:
         try:
             cutoff_time = time.time() - (24 * 60 * 60)  # 24 hours ago
             
-            for filename in os.listdir(REPORT_PATH):
-                filepath = os.path.join(REPORT_PATH, filename)
-                if os.path.isfile(filepath) and os.path.getmtime(filepath) < cutoff_time:
-                    os.remove(filepath)
+            with os.scandir(REPORT_PATH) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff_time:
+                        os.unlink(entry.path)
                     
         except Exception as e:
             logging.error(f"Error cleaning up old reports: {e}")
             
     def monitor_loop(self):
         """Main monitoring loop"""
-        health_check_interval = self.config.get('HEALTH_CHECK_INTERVAL', 300)
-        connectivity_check_interval = self.config.get('CONNECTIVITY_CHECK_INTERVAL', 30)
-        last_health_check = 0
-        last_connectivity_check = 0
+        health_check_interval = self._health_interval
+        connectivity_check_interval = self._connectivity_interval
+        next_health_check = next_connectivity_check = time.monotonic()
         
         while self.running:
             try:
-                current_time = time.time()
+                current_time = time.monotonic()
                 
                 # Connectivity check (more frequent)
-                if current_time - last_connectivity_check >= connectivity_check_interval:
+                if current_time >= next_connectivity_check:
                     connectivity = self.check_network_connectivity()
                     
-                    # Store in history for trend analysis
-                    self.health_history.append({
-                        'timestamp': connectivity['timestamp'],
-                        'type': 'connectivity',
-                        'data': connectivity
-                    })
-                    
-                    # Keep only last 100 entries
-                    if len(self.health_history) > 100:
-                        self.health_history.pop(0)
+                    # Store in history for trend analysis (deque keeps only the last entries)
+                    self.health_history.append(ConnectivitySample(
+                        connectivity['timestamp'],
+                        connectivity['ethernet'],
+                        connectivity['wifi'],
+                        connectivity['tailscale'],
+                        connectivity['internet']
+                    ))
                         
-                    last_connectivity_check = current_time
+                    next_connectivity_check = current_time + connectivity_check_interval
                     
                 # Full health check (less frequent)
-                if current_time - last_health_check >= health_check_interval:
+                if current_time >= next_health_check:
                     report = self.generate_health_report()
                     self.save_health_report(report)
                     
@@ -560,52 +773,70 @@ class HealthMonitor:
                     health_score = report.get('health_score', 0)
                     logging.info(f"Health check: {health_status} ({health_score:.1f}%)")
                     
-                    last_health_check = current_time
+                    next_health_check = current_time + health_check_interval
                     
-                # Sleep for a short interval
-                time.sleep(10)
+                # Sleep until the next check is due; stop() wakes the loop immediately
+                self._stop_event.wait(max(0, min(next_connectivity_check, next_health_check) - time.monotonic()))
                 
             except Exception as e:
                 logging.error(f"Error in monitor loop: {e}")
-                time.sleep(health_check_interval)
+                self._stop_event.wait(health_check_interval)
+                
+    def stop(self):
+        """Stop the monitoring loop without waiting for the current sleep to expire"""
+        self.running = False
+        self._stop_event.set()
                 
     def generate_weekly_report(self) -> str:
         """Generate weekly summary report"""
         try:
-            # Get reports from the last week
+            # Single pass over last week's reports: accumulate running totals, never hold the reports in memory
             week_ago = time.time() - (7 * 24 * 60 * 60)
-            weekly_reports = []
+            report_count = 0
+            health_sum = cpu_sum = memory_sum = 0.0
+            connectivity_issues = 0
+            access_control_up = 0
+            temp_sum = 0.0
+            temp_count = 0
+            max_temp = 0
             
-            for filename in os.listdir(REPORT_PATH):
-                filepath = os.path.join(REPORT_PATH, filename)
-                if os.path.isfile(filepath) and os.path.getmtime(filepath) > week_ago:
+            with os.scandir(REPORT_PATH) as entries:
+                for entry in entries:
+                    if not entry.is_file() or entry.stat().st_mtime <= week_ago:
+                        continue
                     try:
-                        with open(filepath, 'r') as f:
-                            report = json.load(f)
-                            weekly_reports.append(report)
+                        with open(entry.path, 'rb') as f:
+                            report = orjson.loads(f.read()) if ORJSON_AVAILABLE else json.load(f)
                     except:
                         continue
+                    report_count += 1
+                    health_sum += report.get('health_score', 0)
+                    performance = report.get('performance', {})
+                    cpu_sum += performance.get('cpu_percent', 0)
+                    memory_sum += performance.get('memory_percent', 0)
+                    if not report.get('connectivity', {}).get('internet', True):
+                        connectivity_issues += 1
+                    if report.get('services', {}).get('services', {}).get('access_control.service', False):
+                        access_control_up += 1
+                    temp = report.get('hardware', {}).get('cpu_temperature')
+                    if temp:
+                        temp_sum += temp
+                        temp_count += 1
+                        max_temp = max(max_temp, temp)
                         
-            if not weekly_reports:
+            if not report_count:
                 return "📊 *Reporte Semanal*\n\nNo hay datos suficientes para generar reporte"
                 
             # Calculate averages and trends
-            avg_health = sum(r.get('health_score', 0) for r in weekly_reports) / len(weekly_reports)
-            avg_cpu = sum(r.get('performance', {}).get('cpu_percent', 0) for r in weekly_reports) / len(weekly_reports)
-            avg_memory = sum(r.get('performance', {}).get('memory_percent', 0) for r in weekly_reports) / len(weekly_reports)
-            
-            # Count connectivity issues
-            connectivity_issues = sum(1 for r in weekly_reports if not r.get('connectivity', {}).get('internet', True))
+            avg_health = health_sum / report_count
+            avg_cpu = cpu_sum / report_count
+            avg_memory = memory_sum / report_count
             
             # Service uptime
-            service_checks = len(weekly_reports)
-            access_control_up = sum(1 for r in weekly_reports if r.get('services', {}).get('services', {}).get('access_control.service', False))
-            uptime_percentage = (access_control_up / service_checks * 100) if service_checks > 0 else 0
+            uptime_percentage = access_control_up / report_count * 100
             
             # Temperature analysis
-            temps = [r.get('hardware', {}).get('cpu_temperature') for r in weekly_reports if r.get('hardware', {}).get('cpu_temperature')]
-            avg_temp = sum(temps) / len(temps) if temps else 0
-            max_temp = max(temps) if temps else 0
+            avg_temp = temp_sum / temp_count if temp_count else 0
             
             message = f"📊 *Reporte Semanal Sistema Gateway*\n\n"
             message += f"📈 **Salud General**: {avg_health:.1f}%\n"
@@ -614,7 +845,7 @@ class HealthMonitor:
             message += f"💾 **Memoria Promedio**: {avg_memory:.1f}%\n"
             message += f"🌡️ **Temperatura**: {avg_temp:.1f}°C (máx: {max_temp:.1f}°C)\n"
             message += f"🌐 **Problemas Conectividad**: {connectivity_issues}\n"
-            message += f"📊 **Reportes Analizados**: {len(weekly_reports)}\n\n"
+            message += f"📊 **Reportes Analizados**: {report_count}\n\n"
             
             if avg_health >= 90:
                 message += "✅ Sistema funcionando excelentemente"
@@ -639,7 +870,7 @@ class HealthMonitor:
             self.monitor_loop()
         except KeyboardInterrupt:
             logging.info("Shutting down Health Monitor Service")
-            self.running = False
+            self.stop()
             
 def signal_handler(signum, frame):
     """Handle shutdown signals"""
@@ -9,6 +9,7 @@ and ensures 24/7 operation.
 """
 
 import os
+import re
 import sys
 import time
 import json
@@ -16,39 +17,121 @@ import logging
 import subprocess
 import threading
 import signal
+import stat
+import shutil
+import ctypes
 import psutil
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    sys.path.insert(0, '/opt/gateway/services')
+    from telegram_notifier import TelegramNotifier
+except ImportError:
+    TelegramNotifier = None
+
 # Configuration
 CONFIG_PATH = "/opt/gateway/config/monitoring.conf"
 LOG_PATH = "/var/log/system_watchdog.log"
 STATE_FILE = "/tmp/system_watchdog_state.json"
+UINT64_MAX = 2**64 - 1
+SYSFS_CPU_TEMP = "/sys/class/thermal/thermal_zone0/temp"
+SYSFS_THROTTLED = "/sys/devices/platform/soc/soc:firmware/get_throttled"
+
+# Check group -> (config key, default seconds between runs)
+CHECK_INTERVALS = {
+    'metrics': ('METRICS_CHECK_INTERVAL', 60),
+    'services': ('SERVICE_CHECK_INTERVAL', 30),
+    'disk': ('DISK_CHECK_INTERVAL', 300),
+    'memory': ('MEMORY_CHECK_INTERVAL', 60)
+}
+
+# KEY=value config lines; an inline '#' comment must be preceded by whitespace
+_CONFIG_LINE = re.compile(r'^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)(?:[ \t]+#.*)?[ \t]*$', re.M)
+_CONFIG_BOOLEANS = {'true': True, 'false': False}
+
+# 'systemctl show' output: a wanted KEY=value line, or the blank line that separates two units
+_SHOW_PROPERTY = re.compile(r'^(ActiveState|UnitFileState|MemoryCurrent|CPUUsageNSec)=(.*)$|\n\n', re.M)
+
+# get_throttled bits reported individually (bit 0-3: current state)
+_THROTTLE_BITS = (('under_voltage', 0x1), ('frequency_capped', 0x2), ('currently_throttled', 0x4), ('soft_temp_limit', 0x8))
+
+# struct sysinfo (sysinfo(2)): load averages and uptime from one syscall
+class _SysInfo(ctypes.Structure):
+    _fields_ = [
+        ('uptime', ctypes.c_long),
+        ('loads', ctypes.c_ulong * 3),
+        ('totalram', ctypes.c_ulong),
+        ('freeram', ctypes.c_ulong),
+        ('sharedram', ctypes.c_ulong),
+        ('bufferram', ctypes.c_ulong),
+        ('totalswap', ctypes.c_ulong),
+        ('freeswap', ctypes.c_ulong),
+        ('procs', ctypes.c_ushort),
+        ('pad', ctypes.c_ushort),
+        ('totalhigh', ctypes.c_ulong),
+        ('freehigh', ctypes.c_ulong),
+        ('mem_unit', ctypes.c_uint),
+        ('_reserved', ctypes.c_char * 64)  # Covers the libc padding on every ABI
+    ]
+    
+SI_LOAD_SCALE = float(1 << 16)  # loads[] are fixed-point with SI_LOAD_SHIFT = 16
+
+try:
+    _libc = ctypes.CDLL(None, use_errno=True)
+    _libc.sysinfo.argtypes = [ctypes.POINTER(_SysInfo)]
+    SYSINFO_AVAILABLE = True
+except (OSError, AttributeError):
+    SYSINFO_AVAILABLE = False
+
+# Lightweight memory/disk samples read straight from /proc/meminfo and statvfs (same fields the watchdog used from psutil)
+PROC_MEMINFO = "/proc/meminfo"
+_MEMINFO_FIELDS = re.compile(rb'^(MemTotal|MemAvailable|SwapTotal|SwapFree):\s+(\d+)', re.M)
+MemorySample = namedtuple('MemorySample', ['total', 'available', 'percent', 'swap_total', 'swap_free', 'swap_percent'])
+DiskSample = namedtuple('DiskSample', ['total', 'used', 'free', 'percent'])
+
+def _coerce_config_value(value: str):
+    """int if numeric, bool for true/false, the raw string otherwise"""
+    try:
+        return int(value)
+    except ValueError:
+        return _CONFIG_BOOLEANS.get(value.lower(), value)
 
 class SystemWatchdog:
     def __init__(self):
+        self._config_mtime = None
         self.config = self.load_config()
         self.running = True
         self.recovery_attempts = {}
         self.last_alerts = {}
+        self._state_dirty = False  # recovery_attempts/last_alerts changed since the last save_state
+        self._sysfs_fds = {}
+        self._meminfo_fd = None
+        self._next_deep_service_check = 0
+        self._next_due = {'metrics': 0, 'services': 0, 'disk': 0, 'memory': 0}  # time.monotonic() each check group runs next
+        self._throttle_status = None  # Last decoded get_throttled value, reused while it doesn't change
+        self._notifier = None
+        self._notifier_lock = threading.Lock()
+        psutil.cpu_percent(interval=None)  # Prime the baseline: later calls report usage since the previous one
         self.setup_logging()
+        self.check_intervals = self.get_check_intervals()  # After setup_logging: may warn about invalid values
         
     def load_config(self) -> Dict:
         """Load configuration from file"""
         config = {}
         try:
+            self._config_mtime = os.stat(CONFIG_PATH).st_mtime
             with open(CONFIG_PATH, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        # Convert boolean strings
-                        if value.lower() in ('true', 'false'):
-                            value = value.lower() == 'true'
-                        # Convert numeric strings
-                        elif value.isdigit():
-                            value = int(value)
-                        config[key.strip()] = value
+                text = f.read()
+            config = {key: _coerce_config_value(value) for key, value in _CONFIG_LINE.findall(text)}
         except Exception as e:
             logging.error(f"Error loading config: {e}")
             # Default configuration
@@ -63,6 +146,17 @@ class SystemWatchdog:
             }
         return config
         
+    def refresh_config(self):
+        """Re-read the config file only if it changed on disk since the last load"""
+        try:
+            mtime = os.stat(CONFIG_PATH).st_mtime
+        except OSError:
+            return
+        if mtime != self._config_mtime:
+            logging.info("Configuration file changed, reloading")
+            self.config = self.load_config()
+            self.check_intervals = self.get_check_intervals()
+            
     def setup_logging(self):
         """Setup logging configuration"""
         logging.basicConfig(
@@ -77,9 +171,13 @@ class SystemWatchdog:
     def notify_telegram(self, message_type: str, **kwargs):
         """Send notification to Telegram service"""
         try:
-            sys.path.insert(0, '/opt/gateway/services')
-            from telegram_notifier import TelegramNotifier
-            notifier = TelegramNotifier()
+            if TelegramNotifier is None:
+                raise RuntimeError("telegram_notifier module not available")
+            # Created on first use and kept, so config is read once and rate-limit state persists
+            with self._notifier_lock:  # checks run concurrently: build a single instance
+                if self._notifier is None:
+                    self._notifier = TelegramNotifier()
+            notifier = self._notifier
             
             if message_type == 'critical_event':
                 notifier.notify_critical_event(kwargs.get('event_type', 'Unknown'), 
@@ -91,21 +189,24 @@ class SystemWatchdog:
         except Exception as e:
             logging.error(f"Failed to send Telegram notification: {e}")
             
-    def get_system_metrics(self) -> Dict:
-        """Get comprehensive system metrics"""
+    def get_system_metrics(self, memory=None, disk_usage=None) -> Dict:
+        """Get comprehensive system metrics (optionally from memory/disk samples already taken this pass)"""
         try:
+            memory = memory or self.read_memory()
+            disk_usage = disk_usage or self.read_disk_usage('/')
+            load_avg, uptime = self.get_load_and_uptime()
             metrics = {
                 'timestamp': datetime.now(timezone.utc).isoformat(),
-                'cpu_percent': psutil.cpu_percent(interval=1),
-                'memory_percent': psutil.virtual_memory().percent,
-                'memory_available': psutil.virtual_memory().available,
-                'disk_percent': psutil.disk_usage('/').percent,
-                'disk_free': psutil.disk_usage('/').free,
-                'load_avg': psutil.getloadavg(),
-                'uptime': time.time() - psutil.boot_time(),
+                'cpu_percent': psutil.cpu_percent(interval=None),
+                'memory_percent': memory.percent,
+                'memory_available': memory.available,
+                'disk_percent': disk_usage.percent,
+                'disk_free': disk_usage.free,
+                'load_avg': load_avg,
+                'uptime': uptime,
                 'temperature': self.get_cpu_temperature(),
                 'throttled': self.check_throttling(),
-                'process_count': len(psutil.pids())
+                'process_count': self.count_processes()
             }
             
             # Network stats
@@ -136,8 +237,89 @@ class SystemWatchdog:
                 'error': str(e)
             }
             
+    def sysfs_fd(self, path: str) -> int:
+        """Cached read-only file descriptor for a sysfs attribute; -1 if unavailable"""
+        fd = self._sysfs_fds.get(path)
+        if fd is None:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                fd = -1  # Not exposed on this kernel: don't retry every poll
+            self._sysfs_fds[path] = fd
+        return fd
+        
+    def read_sysfs(self, path: str) -> Optional[str]:
+        """Read a small sysfs attribute through a cached file descriptor (pread at offset 0); None if unavailable"""
+        fd = self.sysfs_fd(path)
+        if fd < 0:
+            return None
+        try:
+            return os.pread(fd, 64, 0).decode().strip() or None
+        except OSError:
+            return None
+            
+    def read_sysfs_int(self, path: str) -> Optional[int]:
+        """Integer sysfs attribute parsed straight from the raw bytes (int() skips the trailing newline); None if unavailable"""
+        fd = self.sysfs_fd(path)
+        if fd < 0:
+            return None
+        try:
+            return int(os.pread(fd, 16, 0))
+        except (OSError, ValueError):
+            return None
+            
+    def read_memory(self) -> MemorySample:
+        """Memory and swap figures from one pread of /proc/meminfo (percent computed as psutil does)"""
+        if self._meminfo_fd is None:
+            self._meminfo_fd = os.open(PROC_MEMINFO, os.O_RDONLY)
+        fields = {key: int(value) * 1024 for key, value in _MEMINFO_FIELDS.findall(os.pread(self._meminfo_fd, 4096, 0))}
+        total = fields[b'MemTotal']
+        available = fields.get(b'MemAvailable', 0)
+        swap_total = fields.get(b'SwapTotal', 0)
+        swap_free = fields.get(b'SwapFree', 0)
+        return MemorySample(
+            total=total,
+            available=available,
+            percent=round((total - available) / total * 100, 1) if total else 0.0,
+            swap_total=swap_total,
+            swap_free=swap_free,
+            swap_percent=round((swap_total - swap_free) / swap_total * 100, 1) if swap_total else 0.0
+        )
+        
+    def read_disk_usage(self, path: str = '/') -> DiskSample:
+        """Disk usage from a single statvfs call (percent of the space available to non-root users, as psutil/df)"""
+        st = os.statvfs(path)
+        total = st.f_blocks * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        free = st.f_bavail * st.f_frsize
+        return DiskSample(
+            total=total,
+            used=used,
+            free=free,
+            percent=round(used / (used + free) * 100, 1) if used + free else 0.0
+        )
+        
+    def get_load_and_uptime(self) -> tuple:
+        """(1/5/15 min load averages, uptime seconds) from a single sysinfo(2) call; psutil if unavailable"""
+        if SYSINFO_AVAILABLE:
+            info = _SysInfo()
+            if _libc.sysinfo(ctypes.byref(info)) == 0:
+                return tuple(load / SI_LOAD_SCALE for load in info.loads), info.uptime
+        return psutil.getloadavg(), time.time() - psutil.boot_time()
+        
+    def count_processes(self) -> int:
+        """Number of processes: numeric entries of /proc, counted during a single scandir pass"""
+        with os.scandir('/proc') as entries:
+            return sum(1 for entry in entries if entry.name.isdigit())
+            
     def get_cpu_temperature(self) -> Optional[float]:
         """Get CPU temperature for Raspberry Pi"""
+        # Thermal zone first (plain file read)
+        temp_millidegrees = self.read_sysfs_int(SYSFS_CPU_TEMP)
+        if temp_millidegrees is not None:
+            return temp_millidegrees / 1000.0
+            
+        # Alternative method using vcgencmd
         try:
             result = subprocess.run(['vcgencmd', 'measure_temp'], 
                                   capture_output=True, text=True, timeout=5)
@@ -147,73 +329,73 @@ class SystemWatchdog:
         except:
             pass
             
-        # Alternative method using thermal zone
-        try:
-            with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                temp_millidegrees = int(f.read().strip())
-                return temp_millidegrees / 1000.0
-        except:
-            pass
-            
         return None
         
     def check_throttling(self) -> Dict:
         """Check if system is being throttled"""
         try:
-            result = subprocess.run(['vcgencmd', 'get_throttled'], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                throttle_hex = result.stdout.strip().replace('throttled=', '')
-                throttle_int = int(throttle_hex, 16)
-                
-                return {
-                    'raw_value': throttle_hex,
-                    'is_throttled': throttle_int != 0,
-                    'under_voltage': bool(throttle_int & 0x1),
-                    'frequency_capped': bool(throttle_int & 0x2),
-                    'currently_throttled': bool(throttle_int & 0x4),
-                    'soft_temp_limit': bool(throttle_int & 0x8)
-                }
+            # Firmware sysfs attribute when exposed, vcgencmd otherwise
+            sysfs_throttled = self.read_sysfs(SYSFS_THROTTLED)
+            if sysfs_throttled:
+                throttle_hex = f"0x{int(sysfs_throttled, 16):x}"
+            else:
+                result = subprocess.run(['vcgencmd', 'get_throttled'], 
+                                      capture_output=True, text=True, timeout=5)
+                throttle_hex = result.stdout.strip().replace('throttled=', '') if result.returncode == 0 else ''
+            if throttle_hex:
+                if self._throttle_status is None or self._throttle_status['raw_value'] != throttle_hex:
+                    throttle_int = int(throttle_hex, 16)
+                    status = {'raw_value': throttle_hex, 'is_throttled': throttle_int != 0}
+                    status.update({name: bool(throttle_int & mask) for name, mask in _THROTTLE_BITS})
+                    self._throttle_status = status
+                return self._throttle_status
         except:
             pass
             
         return {'is_throttled': False, 'error': 'Unable to check throttling status'}
         
-    def check_service_health(self, service_name: str) -> Dict:
-        """Check health of a specific service"""
+    def check_services_health(self, service_names: List[str]) -> Dict[str, Dict]:
+        """Check health of several services with a single 'systemctl show' call"""
+        health = {}
+        blocks = []
+        error = 'No status reported by systemctl'
         try:
-            # Check if service is active
-            result = subprocess.run(['systemctl', 'is-active', service_name], 
-                                  capture_output=True, text=True, timeout=10)
-            is_active = result.stdout.strip() == 'active'
-            
-            # Check if service is enabled
-            result = subprocess.run(['systemctl', 'is-enabled', service_name], 
-                                  capture_output=True, text=True, timeout=10)
-            is_enabled = result.stdout.strip() == 'enabled'
-            
-            # Get service status details
-            result = subprocess.run(['systemctl', 'status', service_name], 
+            result = subprocess.run(['systemctl', 'show', '--property=ActiveState,UnitFileState,MemoryCurrent,CPUUsageNSec', '--'] + service_names,
                                   capture_output=True, text=True, timeout=10)
-            status_output = result.stdout
-            
-            # Extract key information
-            memory_usage = None
-            cpu_usage = None
+            # One KEY=value block per unit, in argument order, separated by blank lines:
+            # a single finditer pass yields the properties and the block boundaries
+            if result.stdout.strip():
+                blocks = [{}]
+                for match in _SHOW_PROPERTY.finditer(result.stdout.strip()):
+                    if match.group(1):
+                        blocks[-1][match.group(1)] = match.group(2)
+                    else:
+                        blocks.append({})
+        except Exception as e:
+            error = str(e)
+            
+        for index, service_name in enumerate(service_names):
+            if index >= len(blocks):
+                health[service_name] = {
+                    'name': service_name,
+                    'is_active': False,
+                    'is_enabled': False,
+                    'healthy': False,
+                    'error': error
+                }
+                continue
+                
+            properties = blocks[index]
+            is_active = properties.get('ActiveState') == 'active'
+            is_enabled = properties.get('UnitFileState') in ('enabled', 'static')
             
-            for line in status_output.split('\n'):
-                if 'Memory:' in line:
-                    try:
-                        memory_usage = line.split('Memory:')[1].strip()
-                    except:
-                        pass
-                elif 'CPU:' in line:
-                    try:
-                        cpu_usage = line.split('CPU:')[1].strip()
-                    except:
-                        pass
+            # Unset counters are reported as '[not set]' or as UINT64_MAX depending on the systemd version
+            memory = properties.get('MemoryCurrent', '')
+            cpu = properties.get('CPUUsageNSec', '')
+            memory_usage = f"{int(memory) / (1024 * 1024):.1f}M" if memory.isdigit() and int(memory) < UINT64_MAX else None
+            cpu_usage = f"{int(cpu) / 1e9:.3f}s" if cpu.isdigit() and int(cpu) < UINT64_MAX else None
             
-            return {
+            health[service_name] = {
                 'name': service_name,
                 'is_active': is_active,
                 'is_enabled': is_enabled,
@@ -222,14 +404,11 @@ class SystemWatchdog:
                 'healthy': is_active and is_enabled
             }
             
-        except Exception as e:
-            return {
-                'name': service_name,
-                'is_active': False,
-                'is_enabled': False,
-                'healthy': False,
-                'error': str(e)
-            }
+        return health
+        
+    def check_service_health(self, service_name: str) -> Dict:
+        """Check health of a specific service"""
+        return self.check_services_health([service_name])[service_name]
             
     def restart_service(self, service_name: str) -> bool:
         """Restart a failed service"""
@@ -246,6 +425,7 @@ class SystemWatchdog:
                 
             # Increment attempt counter
             self.recovery_attempts[service_name] = attempts + 1
+            self._state_dirty = True
             
             # Restart the service
             result = subprocess.run(['systemctl', 'restart', service_name], 
@@ -270,10 +450,10 @@ class SystemWatchdog:
             logging.error(f"Error restarting service {service_name}: {e}")
             return False
             
-    def check_disk_space(self) -> Dict:
+    def check_disk_space(self, disk_usage=None) -> Dict:
         """Check disk space and clean up if necessary"""
         try:
-            disk_usage = psutil.disk_usage('/')
+            disk_usage = disk_usage or self.read_disk_usage('/')
             disk_percent = (disk_usage.used / disk_usage.total) * 100
             
             result = {
@@ -294,7 +474,7 @@ class SystemWatchdog:
                 
                 if cleanup_success:
                     # Recalculate after cleanup
-                    disk_usage = psutil.disk_usage('/')
+                    disk_usage = self.read_disk_usage('/')
                     result['disk_percent'] = (disk_usage.used / disk_usage.total) * 100
                     result['disk_free_gb'] = disk_usage.free / (1024**3)
                     
@@ -307,22 +487,22 @@ class SystemWatchdog:
     def cleanup_disk_space(self) -> bool:
         """Clean up disk space"""
         try:
-            cleanup_commands = [
-                # Clean package cache
-                ['apt-get', 'clean'],
-                # Remove old log files
-                ['journalctl', '--vacuum-time=7d'],
-                # Clean temporary files
-                ['find', '/tmp', '-type', 'f', '-mtime', '+7', '-delete'],
-                # Clean old pip cache
-                ['rm', '-rf', '/root/.cache/pip/*']
-            ]
+            # Package cache and old journal entries in one low-priority shell
+            # (idle I/O class for the shell and everything it runs)
+            cleanup_script = ('ionice -c3 -p $$ 2>/dev/null; '
+                              'apt-get clean; '
+                              'journalctl --vacuum-time=7d')
+            try:
+                subprocess.run(['nice', '-n', '19', 'sh', '-c', cleanup_script], capture_output=True, timeout=120)
+            except:
+                pass
+                
+            # Clean old pip cache
+            shutil.rmtree('/root/.cache/pip', ignore_errors=True)
             
-            for cmd in cleanup_commands:
-                try:
-                    subprocess.run(cmd, capture_output=True, timeout=60)
-                except:
-                    continue
+            # Clean temporary files (in-process equivalent of 'find /tmp -type f -mtime +7 -delete')
+            removed = self.remove_old_files('/tmp', 7)
+            logging.info(f"Removed {removed} old temporary files")
                     
             logging.info("Disk cleanup completed")
             return True
@@ -331,17 +511,33 @@ class SystemWatchdog:
             logging.error(f"Error during disk cleanup: {e}")
             return False
             
-    def check_memory_pressure(self) -> Dict:
+    def remove_old_files(self, root: str, max_age_days: int) -> int:
+        """Delete regular files under root older than max_age_days full days (like find -mtime +N); returns count"""
+        cutoff = time.time() - (max_age_days + 1) * 24 * 60 * 60
+        removed = 0
+        # fwalk + dir_fd: every stat/unlink is relative to an already-open directory, so a symlink
+        # swapped in for a parent directory (world-writable /tmp) cannot redirect the delete
+        for _, _, filenames, dirfd in os.fwalk(root, follow_symlinks=False):
+            for name in filenames:
+                try:
+                    st = os.stat(name, dir_fd=dirfd, follow_symlinks=False)
+                    if stat.S_ISREG(st.st_mode) and st.st_mtime <= cutoff:
+                        os.unlink(name, dir_fd=dirfd)
+                        removed += 1
+                except OSError:
+                    continue
+        return removed
+        
+    def check_memory_pressure(self, memory=None) -> Dict:
         """Check memory pressure and take action if needed"""
         try:
-            memory = psutil.virtual_memory()
-            swap = psutil.swap_memory()
+            memory = memory or self.read_memory()
             
             result = {
                 'memory_percent': memory.percent,
                 'memory_available_gb': memory.available / (1024**3),
-                'swap_percent': swap.percent,
-                'swap_free_gb': swap.free / (1024**3),
+                'swap_percent': memory.swap_percent,
+                'swap_free_gb': memory.swap_free / (1024**3),
                 'action_taken': False
             }
             
@@ -355,7 +551,7 @@ class SystemWatchdog:
                     result['action_taken'] = True
                     
                     # Recalculate after cleanup
-                    memory = psutil.virtual_memory()
+                    memory = self.read_memory()
                     result['memory_percent'] = memory.percent
                     result['memory_available_gb'] = memory.available / (1024**3)
                     
@@ -403,6 +599,7 @@ class SystemWatchdog:
                                        'disk': metrics.get('disk_percent')
                                    })
                 self.last_alerts['cpu'] = now
+                self._state_dirty = True
                 
         # Temperature alert
         temp_threshold = self.config.get('TEMPERATURE_THRESHOLD', 75)
@@ -413,6 +610,7 @@ class SystemWatchdog:
                                    event_type='High Temperature',
                                    details=f"CPU temperature: {temp}°C (threshold: {temp_threshold}°C)")
                 self.last_alerts['temperature'] = now
+                self._state_dirty = True
                 
         # Throttling alert
         throttled = metrics.get('throttled', {})
@@ -422,9 +620,12 @@ class SystemWatchdog:
                                    event_type='System Throttling',
                                    details=f"System is being throttled: {throttled}")
                 self.last_alerts['throttling'] = now
+                self._state_dirty = True
                 
     def save_state(self):
-        """Save current state to file"""
+        """Save current state to file (only when it changed since the last save)"""
+        if not self._state_dirty:
+            return
         try:
             state = {
                 'recovery_attempts': self.recovery_attempts,
@@ -432,8 +633,18 @@ class SystemWatchdog:
                 'last_update': datetime.now(timezone.utc).isoformat()
             }
             
-            with open(STATE_FILE, 'w') as f:
-                json.dump(state, f, indent=2)
+            # Compact encoding: the file is only read back by load_state
+            if ORJSON_AVAILABLE:
+                buf = orjson.dumps(state)
+            else:
+                buf = json.dumps(state, separators=(',', ':')).encode('utf-8')
+                
+            # Write to a temp file and rename so a crash never leaves torn JSON behind
+            tmp_path = STATE_FILE + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(buf)
+            os.replace(tmp_path, STATE_FILE)
+            self._state_dirty = False
                 
         except Exception as e:
             logging.error(f"Error saving state: {e}")
@@ -442,8 +653,8 @@ class SystemWatchdog:
         """Load previous state from file"""
         try:
             if os.path.exists(STATE_FILE):
-                with open(STATE_FILE, 'r') as f:
-                    state = json.load(f)
+                with open(STATE_FILE, 'rb') as f:
+                    state = orjson.loads(f.read()) if ORJSON_AVAILABLE else json.load(f)
                     
                 self.recovery_attempts = state.get('recovery_attempts', {})
                 self.last_alerts = state.get('last_alerts', {})
@@ -453,51 +664,110 @@ class SystemWatchdog:
         except Exception as e:
             logging.error(f"Error loading state: {e}")
             
+    def check_metrics_and_alerts(self, memory, disk_usage):
+        """Collect system metrics and send threshold alerts"""
+        metrics = self.get_system_metrics(memory, disk_usage)
+        self.check_system_alerts(metrics)
+        
+    def get_failed_services(self) -> set:
+        """Names of failed service units, from one 'systemctl list-units --state=failed' call"""
+        result = subprocess.run(['systemctl', 'list-units', '--type=service', '--state=failed', '--plain', '--no-legend', '--no-pager'],
+                              capture_output=True, text=True, timeout=10)
+        return {line.split(None, 1)[0] for line in result.stdout.splitlines() if line.strip()}
+        
+    def check_critical_services(self):
+        """Restart failed critical services; every SERVICE_DEEP_CHECK_INTERVAL also check active/enabled state in depth"""
+        critical_services = ['access_control.service', 'network-monitor.service']
+        
+        now = time.monotonic()
+        if now >= self._next_deep_service_check:
+            self._next_deep_service_check = now + int(self.config.get('SERVICE_DEEP_CHECK_INTERVAL', 300))
+            services_health = self.check_services_health(critical_services)
+            unhealthy = [service for service in critical_services if not services_health[service]['healthy']]
+        else:
+            # Cheap pass: a single list of failed units, whatever the number of critical services
+            failed = self.get_failed_services()
+            unhealthy = [service for service in critical_services if service in failed]
+            
+        for service in unhealthy:
+            if self.config.get('AUTO_RECOVERY', True):
+                logging.warning(f"Service {service} is unhealthy, attempting recovery")
+                self.restart_service(service)
+                
+    def check_disk(self, disk_usage):
+        """Check disk space, cleaning up when needed"""
+        disk_status = self.check_disk_space(disk_usage)
+        if disk_status.get('cleanup_performed'):
+            self.notify_telegram('critical_event',
+                               event_type='Disk Cleanup',
+                               details=f"Disk cleanup performed. Usage: {disk_status.get('disk_percent', 'N/A')}%")
+            
+    def check_memory(self, memory):
+        """Check memory pressure, freeing memory when needed"""
+        memory_status = self.check_memory_pressure(memory)
+        if memory_status.get('action_taken'):
+            self.notify_telegram('critical_event',
+                               event_type='Memory Cleanup',
+                               details=f"Memory cleanup performed. Usage: {memory_status.get('memory_percent', 'N/A')}%")
+                               
+    def get_check_intervals(self) -> Dict[str, int]:
+        """Seconds between runs of each check group (stable resources are checked less often).
+        Validated once per config load: a missing, non-integer or non-positive value falls back to its default"""
+        intervals = {}
+        for name, (key, default) in CHECK_INTERVALS.items():
+            value = self.config.get(key, default)
+            try:
+                intervals[name] = int(value)
+            except (TypeError, ValueError):
+                intervals[name] = 0
+            if intervals[name] <= 0:
+                logging.warning(f"Invalid {key}={value!r}, using {default}s")
+                intervals[name] = default
+        return intervals
+        
     def watchdog_loop(self):
         """Main watchdog monitoring loop"""
-        check_interval = 60  # Check every minute
-        
         while self.running:
             try:
-                # Get system metrics
-                metrics = self.get_system_metrics()
+                # Pick up config edits (one stat per pass, re-parse only on change)
+                self.refresh_config()
+                intervals = self.check_intervals
                 
-                # Check system alerts
-                self.check_system_alerts(metrics)
+                now = time.monotonic()
+                due = {name for name, next_due in self._next_due.items() if now >= next_due}
                 
-                # Check critical services
-                critical_services = ['access_control.service', 'network-monitor.service']
+                # One memory/disk sample per pass, shared by metrics and the pressure/space checks
+                memory = self.read_memory() if due & {'metrics', 'memory'} else None
+                disk_usage = self.read_disk_usage('/') if due & {'metrics', 'disk'} else None
                 
-                for service in critical_services:
-                    service_health = self.check_service_health(service)
-                    
-                    if not service_health['healthy'] and self.config.get('AUTO_RECOVERY', True):
-                        logging.warning(f"Service {service} is unhealthy, attempting recovery")
-                        self.restart_service(service)
-                        
-                # Check disk space
-                disk_status = self.check_disk_space()
-                if disk_status.get('cleanup_performed'):
-                    self.notify_telegram('critical_event',
-                                       event_type='Disk Cleanup',
-                                       details=f"Disk cleanup performed. Usage: {disk_status.get('disk_percent', 'N/A')}%")
-                    
-                # Check memory pressure
-                memory_status = self.check_memory_pressure()
-                if memory_status.get('action_taken'):
-                    self.notify_telegram('critical_event',
-                                       event_type='Memory Cleanup',
-                                       details=f"Memory cleanup performed. Usage: {memory_status.get('memory_percent', 'N/A')}%")
+                checks = {
+                    'metrics': (self.check_metrics_and_alerts, memory, disk_usage),
+                    'services': (self.check_critical_services,),
+                    'disk': (self.check_disk, disk_usage),
+                    'memory': (self.check_memory, memory)
+                }
+                
+                # Due checks are independent and mostly wait on subprocesses
+                # (systemctl, vcgencmd, cleanup tools): run them concurrently
+                with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+                    futures = [executor.submit(*checks[name]) for name in due]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logging.error(f"Error in watchdog check: {e}")
+                for name in due:
+                    self._next_due[name] = now + intervals[name]
                 
                 # Save state
                 self.save_state()
                 
-                # Wait for next check
-                time.sleep(check_interval)
+                # Sleep until the next check is due
+                time.sleep(max(0, min(self._next_due.values()) - time.monotonic()))
                 
             except Exception as e:
                 logging.error(f"Error in watchdog loop: {e}")
-                time.sleep(check_interval)
+                time.sleep(min(self.check_intervals.values()))
                 
     def run(self):
         """Main run method"""
@@ -9,48 +9,113 @@ and logs user access events.
 """
 
 import os
+import re
 import sys
-import time
 import json
 import logging
+import logging.handlers
 import subprocess
 import threading
 import signal
-import requests
+import shutil
+import queue
+import socket
+import http.client
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Set
 
 # Configuration
 CONFIG_PATH = "/opt/gateway/config/tailscale.conf"
 LOG_PATH = "/var/log/tailscale_monitor.log"
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUP_COUNT = 3
 STATE_FILE = "/tmp/tailscale_monitor_state.json"
+NOTIFY_QUEUE_SIZE = 256
+TAILSCALED_SOCKET = "/var/run/tailscale/tailscaled.sock"
+LOCALAPI_HOST = "local-tailscaled.sock"
+STATUS_ARGV = ('tailscale', 'status', '--json')
+LOGIN_STATUS_ARGV = ('tailscale', 'status')
+UP_ARGV = ('tailscale', 'up')
+ENABLE_TAILSCALED_ARGV = ('systemctl', 'enable', '--now', 'tailscaled')
+MAX_CHECK_INTERVAL = 300  # Upper bound for the backed-off interval while the tailnet is stable
+MAX_BACKOFF_SHIFT = 3  # Stable interval grows up to check_interval * 8
+
+# KEY=value config lines; an inline '#' comment must be preceded by whitespace
+_CONFIG_LINE = re.compile(r'^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)(?:[ \t]+#.*)?[ \t]*$', re.M)
+_CONFIG_BOOLEANS = {'true': True, 'false': False}
+
+def _coerce_config_value(value: str):
+    """int if numeric, bool for true/false, the raw string otherwise"""
+    try:
+        return int(value)
+    except ValueError:
+        return _CONFIG_BOOLEANS.get(value.lower(), value)
+        
+def _parse_cpuset(value) -> Set[int]:
+    """CPU list in cpuset notation ('0', '1-3', '0,2') to a set of CPU numbers"""
+    cpus = set()
+    for part in str(value).split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+    
 TELEGRAM_NOTIFIER_PATH = "/opt/gateway/services/telegram_notifier.py"
 
+try:
+    if os.path.dirname(TELEGRAM_NOTIFIER_PATH) not in sys.path:
+        sys.path.insert(0, os.path.dirname(TELEGRAM_NOTIFIER_PATH))
+    from telegram_notifier import TelegramNotifier
+except ImportError:
+    TelegramNotifier = None
+
+class LocalAPIConnection(http.client.HTTPConnection):
+    """HTTP connection to tailscaled's LocalAPI over its Unix socket"""
+    def __init__(self, socket_path: str, timeout: float = 10):
+        super().__init__(LOCALAPI_HOST, timeout=timeout)
+        self.socket_path = socket_path
+        
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+        
+# Telegram message type -> call on the cached TelegramNotifier
+TELEGRAM_HANDLERS = {
+    'tailscale_access': lambda notifier, kwargs: notifier.notify_tailscale_access(kwargs.get('user', 'Unknown'),
+                                                                                   kwargs.get('action', 'connected'))
+}
+
 class TailscaleMonitor:
     def __init__(self):
+        self._config_mtime = None
         self.config = self.load_config()
+        self.apply_config()
         self.running = True
-        self.connected_users = set()
+        self._stop_event = threading.Event()
+        self.connected_users = frozenset()
         self.connection_status = False
         self.setup_logging()
         self.telegram_notifier = None
+        self._localapi = None  # Kept open across checks (HTTP keep-alive)
+        self._saved_state = None  # (connection_status, users) last written by save_state
+        self._users_json = '[]'  # connected_users serialized once per change, spliced into the state file
+        self._healthy_streak = 0  # Consecutive healthy checks with no state change
+        # Notifications are sent from a worker thread so a slow Telegram call never stalls the monitor loop
+        # (started in run(), so constructing the monitor has no side effects on the process)
+        self._notify_queue = queue.Queue(maxsize=NOTIFY_QUEUE_SIZE)
+        self._notify_thread = threading.Thread(target=self._notify_worker, name="telegram-notify", daemon=True)
         
     def load_config(self) -> Dict:
         """Load configuration from file"""
         config = {}
         try:
+            self._config_mtime = os.stat(CONFIG_PATH).st_mtime
             with open(CONFIG_PATH, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        # Convert boolean strings
-                        if value.lower() in ('true', 'false'):
-                            value = value.lower() == 'true'
-                        # Convert numeric strings
-                        elif value.isdigit():
-                            value = int(value)
-                        config[key.strip()] = value
+                text = f.read()
+            config = {key: _coerce_config_value(value) for key, value in _CONFIG_LINE.findall(text)}
         except Exception as e:
             logging.error(f"Error loading config: {e}")
             # Default configuration
@@ -63,37 +128,91 @@ class TailscaleMonitor:
             }
         return config
         
+    def apply_config(self):
+        """Bind the settings read on every monitoring pass to attributes"""
+        self.check_interval = int(self.config.get('CHECK_INTERVAL', 30))
+        self.log_connections = bool(self.config.get('LOG_CONNECTIONS', True))
+        self.reconnect_attempts = int(self.config.get('RECONNECT_ATTEMPTS', 3))
+        self.reconnect_delay = int(self.config.get('RECONNECT_DELAY', 60))
+        
+    def refresh_config(self):
+        """Re-read the config file only if it changed on disk since the last load"""
+        try:
+            mtime = os.stat(CONFIG_PATH).st_mtime
+        except OSError:
+            return
+        if mtime != self._config_mtime:
+            logging.info("Configuration file changed, reloading")
+            self.config = self.load_config()
+            self.apply_config()
+            
     def setup_logging(self):
         """Setup logging configuration"""
         logging.basicConfig(
             level=logging.INFO,
             format='%(asctime)s - %(levelname)s - %(message)s',
             handlers=[
-                logging.FileHandler(LOG_PATH),
+                # Size-capped in process; this log is not in the logrotate config
+                logging.handlers.RotatingFileHandler(LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT),
                 logging.StreamHandler()
             ]
         )
         
+    def apply_cpu_placement(self):
+        """Pin the monitor (and the tailscale CLI it spawns) to MONITOR_CPUSET at MONITOR_NICE priority"""
+        # Keeps the periodic wake-ups off the cores tailscaled forwards traffic on
+        # (pair with: systemctl set-property tailscaled.service CPUAffinity=1-3)
+        try:
+            cpuset = self.config.get('MONITOR_CPUSET', '0')
+            if cpuset != '':
+                cpus = _parse_cpuset(cpuset) & os.sched_getaffinity(0)
+                if cpus:
+                    os.sched_setaffinity(0, cpus)
+                    logging.info(f"Monitor pinned to CPU(s) {sorted(cpus)}")
+                else:
+                    logging.warning(f"MONITOR_CPUSET={cpuset} matches no available CPU, affinity unchanged")
+        except (ValueError, OSError, AttributeError) as e:
+            logging.warning(f"Could not set CPU affinity: {e}")
+            
+        try:
+            increment = int(self.config.get('MONITOR_NICE', 5))
+            if increment:
+                os.nice(increment)
+        except (ValueError, OSError) as e:
+            logging.warning(f"Could not lower process priority: {e}")
+            
     def notify_telegram(self, message_type: str, **kwargs):
+        """Queue a notification for the Telegram worker (never blocks)"""
+        try:
+            self._notify_queue.put_nowait((message_type, kwargs))
+        except queue.Full:
+            logging.error(f"Telegram notification queue full, dropping '{message_type}' notification")
+            
+    def _notify_worker(self):
+        """Send queued notifications until the None sentinel arrives"""
+        while True:
+            item = self._notify_queue.get()
+            if item is None:
+                break
+            self.send_telegram(*item)
+            
+    def send_telegram(self, message_type: str, kwargs: Dict):
         """Send notification to Telegram service"""
         try:
-            if message_type == 'tailscale_access':
-                # Import here to avoid circular imports
-                sys.path.insert(0, '/opt/gateway/services')
-                from telegram_notifier import TelegramNotifier
-                notifier = TelegramNotifier()
-                notifier.notify_tailscale_access(kwargs.get('user', 'Unknown'), kwargs.get('action', 'connected'))
+            if message_type not in TELEGRAM_HANDLERS:
+                return
+            if TelegramNotifier is None:
+                raise RuntimeError("telegram_notifier module not available")
+            # Created on first use and kept, so config is read once and rate-limit state persists
+            if self.telegram_notifier is None:
+                self.telegram_notifier = TelegramNotifier()
+            TELEGRAM_HANDLERS[message_type](self.telegram_notifier, kwargs)
         except Exception as e:
             logging.error(f"Failed to send Telegram notification: {e}")
             
     def is_tailscale_installed(self) -> bool:
-        """Check if Tailscale is installed"""
-        try:
-            result = subprocess.run(['which', 'tailscale'], 
-                                  capture_output=True, text=True, timeout=5)
-            return result.returncode == 0
-        except:
-            return False
+        """Check if Tailscale is installed (PATH lookup, no subprocess)"""
+        return shutil.which('tailscale') is not None
             
     def install_tailscale(self) -> bool:
         """Install Tailscale if not present"""
@@ -128,14 +247,14 @@ class TailscaleMonitor:
                 return False
                 
             # Check if already authenticated
-            result = subprocess.run(['tailscale', 'status'], 
+            result = subprocess.run(LOGIN_STATUS_ARGV, 
                                   capture_output=True, text=True, timeout=10)
             if result.returncode == 0 and 'Logged out' not in result.stdout:
                 logging.info("Tailscale already authenticated")
                 return True
                 
             # Authenticate
-            cmd = ['tailscale', 'up', '--authkey', tskey]
+            cmd = [*UP_ARGV, '--authkey', tskey]
             
             # Add optional flags based on configuration
             if self.config.get('ACCEPT_ROUTES', True):
@@ -158,22 +277,53 @@ class TailscaleMonitor:
             logging.error(f"Error authenticating Tailscale: {e}")
             return False
             
+    def localapi_get(self, path: str) -> Optional[bytes]:
+        """GET a LocalAPI endpoint from tailscaled; None if the socket is unavailable or the request fails"""
+        if not os.path.exists(TAILSCALED_SOCKET):
+            return None
+        # A kept-alive connection may have been closed by tailscaled: retry once on a fresh one
+        for attempt in range(2):
+            try:
+                if self._localapi is None:
+                    self._localapi = LocalAPIConnection(TAILSCALED_SOCKET)
+                self._localapi.request('GET', path, headers={'Host': LOCALAPI_HOST})
+                response = self._localapi.getresponse()
+                body = response.read()
+                if response.status == 200:
+                    return body
+                logging.warning(f"LocalAPI {path} returned HTTP {response.status}")
+                return None
+            except (OSError, http.client.HTTPException) as e:
+                if self._localapi is not None:
+                    self._localapi.close()
+                    self._localapi = None
+                if attempt:
+                    logging.warning(f"LocalAPI {path} unavailable: {e}")
+        return None
+        
     def get_tailscale_status(self) -> Dict:
         """Get Tailscale connection status and peer information"""
         try:
-            result = subprocess.run(['tailscale', 'status', '--json'], 
-                                  capture_output=True, text=True, timeout=10)
-            
-            if result.returncode == 0:
-                status_data = json.loads(result.stdout)
+            # tailscaled's LocalAPI socket first (no process spawn), the CLI as a fallback
+            body = self.localapi_get('/localapi/v0/status')
+            if body is None:
+                # Raw bytes straight into json.loads: no text decode of the output
+                result = subprocess.run(STATUS_ARGV, capture_output=True, timeout=10)
+                if result.returncode != 0:
+                    return {'connected': False, 'error': result.stderr.decode(errors='replace')}
+                body = result.stdout
+                
+            if body:
+                status_data = json.loads(body)
                 return {
                     'connected': True,
-                    'self_ip': status_data.get('TailscaleIPs', ['Unknown'])[0],
-                    'peers': status_data.get('Peer', {}),
+                    # tailscaled reports "Peer": null / "TailscaleIPs": null (no peers, not logged in), not a missing key
+                    'self_ip': (status_data.get('TailscaleIPs') or ['Unknown'])[0],
+                    'peers': status_data.get('Peer') or {},
                     'backend_state': status_data.get('BackendState', 'Unknown')
                 }
             else:
-                return {'connected': False, 'error': result.stderr}
+                return {'connected': False, 'error': 'Empty status from tailscale'}
                 
         except Exception as e:
             logging.error(f"Error getting Tailscale status: {e}")
@@ -181,17 +331,18 @@ class TailscaleMonitor:
             
     def monitor_user_connections(self, status: Dict):
         """Monitor and log user connections/disconnections"""
-        if not status.get('connected') or not self.config.get('LOG_CONNECTIONS', True):
+        if not status.get('connected') or not self.log_connections:
             return
             
-        current_users = set()
         peers = status.get('peers', {})
+        # Offline peers are filtered before the hostname is looked up; an empty HostName falls back to the peer id
+        current_users = frozenset(peer_info.get('HostName') or peer_id
+                                  for peer_id, peer_info in peers.items() if peer_info.get('Online'))
         
-        for peer_id, peer_info in peers.items():
-            if peer_info.get('Online', False):
-                user_name = peer_info.get('HostName', peer_id)
-                current_users.add(user_name)
-                
+        # Steady state: same users online, nothing to log or notify
+        if current_users == self.connected_users:
+            return
+            
         # Check for new connections
         new_users = current_users - self.connected_users
         for user in new_users:
@@ -205,20 +356,16 @@ class TailscaleMonitor:
             self.notify_telegram('tailscale_access', user=user, action='disconnected')
             
         self.connected_users = current_users
+        self._users_json = json.dumps(sorted(current_users))
         
-    def check_connection_health(self) -> bool:
-        """Check if Tailscale connection is healthy"""
+    def check_connection_health(self, status: Optional[Dict] = None) -> bool:
+        """Check if Tailscale connection is healthy (from an already fetched status when given)"""
         try:
-            status = self.get_tailscale_status()
-            
-            if not status.get('connected'):
-                return False
+            if status is None:
+                status = self.get_tailscale_status()
                 
-            # Check if we can reach the coordination server
-            result = subprocess.run(['tailscale', 'ping', 'login.tailscale.com'], 
-                                  capture_output=True, text=True, timeout=15)
-            
-            return result.returncode == 0
+            # tailscaled reports 'Running' only while logged in and connected to the coordination server
+            return bool(status.get('connected')) and status.get('backend_state') == 'Running'
             
         except Exception as e:
             logging.error(f"Error checking connection health: {e}")
@@ -228,13 +375,13 @@ class TailscaleMonitor:
         """Attempt to reconnect Tailscale"""
         logging.info("Attempting to reconnect Tailscale...")
         
-        max_attempts = self.config.get('RECONNECT_ATTEMPTS', 3)
-        delay = self.config.get('RECONNECT_DELAY', 60)
+        max_attempts = self.reconnect_attempts
+        delay = self.reconnect_delay
         
         for attempt in range(max_attempts):
             try:
                 # First try to bring connection back up
-                result = subprocess.run(['tailscale', 'up'], 
+                result = subprocess.run(UP_ARGV, 
                                       capture_output=True, text=True, timeout=60)
                 
                 if result.returncode == 0:
@@ -248,27 +395,35 @@ class TailscaleMonitor:
                     
                 if attempt < max_attempts - 1:
                     logging.warning(f"Reconnection attempt {attempt + 1} failed, retrying in {delay}s")
-                    time.sleep(delay)
+                    if self._stop_event.wait(delay):
+                        return False
                     
             except Exception as e:
                 logging.error(f"Reconnection attempt {attempt + 1} error: {e}")
-                if attempt < max_attempts - 1:
-                    time.sleep(delay)
+                if attempt < max_attempts - 1 and self._stop_event.wait(delay):
+                    return False
                     
         logging.error("All reconnection attempts failed")
         return False
         
     def save_state(self):
-        """Save current state to file"""
+        """Save current state to file (only when it changed since the last save)"""
+        # Compare the fields that matter, not the serialized payload: last_update differs on every call
+        snapshot = (self.connection_status, self.connected_users)
+        if snapshot == self._saved_state:
+            return
         try:
-            state = {
-                'connection_status': self.connection_status,
-                'connected_users': list(self.connected_users),
-                'last_update': datetime.now(timezone.utc).isoformat()
-            }
+            # The user list is already serialized by monitor_user_connections; only the scalars are formatted here
+            payload = (f'{{"connection_status": {"true" if self.connection_status else "false"}, '
+                       f'"connected_users": {self._users_json}, '
+                       f'"last_update": "{datetime.now(timezone.utc).isoformat()}"}}')
             
-            with open(STATE_FILE, 'w') as f:
-                json.dump(state, f, indent=2)
+            # Write to a temp file and rename so a crash never leaves torn JSON behind
+            tmp_path = STATE_FILE + '.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(payload)
+            os.replace(tmp_path, STATE_FILE)
+            self._saved_state = snapshot
                 
         except Exception as e:
             logging.error(f"Error saving state: {e}")
@@ -281,17 +436,38 @@ class TailscaleMonitor:
                     state = json.load(f)
                     
                 self.connection_status = state.get('connection_status', False)
-                self.connected_users = set(state.get('connected_users', []))
+                self.connected_users = frozenset(state.get('connected_users', []))
+                self._users_json = json.dumps(sorted(self.connected_users))
+                self._saved_state = (self.connection_status, self.connected_users)
                 
                 logging.info("Previous state loaded successfully")
                 
         except Exception as e:
             logging.error(f"Error loading state: {e}")
             
-    def get_statistics(self) -> Dict:
-        """Get connection statistics and metrics"""
+    @staticmethod
+    def _peer_summary(peers: Dict) -> Dict:
+        """Peer counts only"""
+        return {
+            'peers_total': len(peers),
+            'peers_online': sum(1 for peer_info in peers.values() if peer_info.get('Online'))
+        }
+        
+    @staticmethod
+    def _peer_details(peers: Dict) -> List[Dict]:
+        """One record per peer"""
+        return [{
+            'hostname': peer_info.get('HostName') or peer_id,
+            'online': peer_info.get('Online', False),
+            'last_seen': peer_info.get('LastSeen', 'Unknown'),
+            'ip': (peer_info.get('TailscaleIPs') or ['Unknown'])[0]
+        } for peer_id, peer_info in peers.items()]
+        
+    def get_statistics(self, detail: bool = False) -> Dict:
+        """Get connection statistics and metrics (per-peer records only when detail is set)"""
         try:
             status = self.get_tailscale_status()
+            peers = status.get('peers', {})
             
             stats = {
                 'connection_status': status.get('connected', False),
@@ -299,23 +475,13 @@ class TailscaleMonitor:
                 'backend_state': status.get('backend_state', 'Unknown'),
                 'connected_users_count': len(self.connected_users),
                 'connected_users': list(self.connected_users),
-                'last_check': datetime.now(timezone.utc).isoformat()
+                'last_check': datetime.now(timezone.utc).isoformat(),
+                **self._peer_summary(peers)
             }
             
-            # Add peer details
-            peers = status.get('peers', {})
-            peer_details = []
-            
-            for peer_id, peer_info in peers.items():
-                peer_details.append({
-                    'hostname': peer_info.get('HostName', peer_id),
-                    'online': peer_info.get('Online', False),
-                    'last_seen': peer_info.get('LastSeen', 'Unknown'),
-                    'ip': peer_info.get('TailscaleIPs', ['Unknown'])[0] if peer_info.get('TailscaleIPs') else 'Unknown'
-                })
+            if detail:
+                stats['peer_details'] = self._peer_details(peers)
                 
-            stats['peer_details'] = peer_details
-            
             return stats
             
         except Exception as e:
@@ -341,8 +507,7 @@ class TailscaleMonitor:
             
         # Enable and start Tailscale service
         try:
-            subprocess.run(['systemctl', 'enable', 'tailscaled'], timeout=30, check=True)
-            subprocess.run(['systemctl', 'start', 'tailscaled'], timeout=30, check=True)
+            subprocess.run(ENABLE_TAILSCALED_ARGV, timeout=30, check=True)
             logging.info("Tailscale service enabled and started")
         except Exception as e:
             logging.error(f"Error managing Tailscale service: {e}")
@@ -351,15 +516,18 @@ class TailscaleMonitor:
         
     def monitor_loop(self):
         """Main monitoring loop"""
-        check_interval = self.config.get('CHECK_INTERVAL', 30)
         consecutive_failures = 0
         max_failures = 3
         
-        while self.running:
+        while not self._stop_event.is_set():
             try:
+                # Pick up config edits (one stat per pass, re-parse only on change)
+                self.refresh_config()
+                
                 # Get current status
                 status = self.get_tailscale_status()
                 current_connected = status.get('connected', False)
+                previous = (self.connection_status, self.connected_users)
                 
                 # Check for connection state changes
                 if current_connected != self.connection_status:
@@ -393,17 +561,41 @@ class TailscaleMonitor:
                 # Save current state
                 self.save_state()
                 
-                # Wait for next check
-                time.sleep(check_interval)
+                # Back off while connected and nothing changed; any change or failure polls at check_interval again
+                if current_connected and previous == (self.connection_status, self.connected_users):
+                    wait = min(self.check_interval * (1 << min(self._healthy_streak, MAX_BACKOFF_SHIFT)), MAX_CHECK_INTERVAL)
+                    self._healthy_streak += 1
+                else:
+                    wait = self.check_interval
+                    self._healthy_streak = 0
+                    
+                # Wait for next check (returns at once when stop() is called)
+                self._stop_event.wait(wait)
                 
-            except Exception as e:
+            except (subprocess.SubprocessError, OSError, ValueError) as e:
+                # Runtime failures (CLI, sockets, files, malformed JSON) are retried; anything else is a bug
+                # and propagates so systemd (Restart=always) restarts the service with the traceback in the journal
                 logging.error(f"Error in monitoring loop: {e}")
-                time.sleep(check_interval)
+                self._healthy_streak = 0
+                self._stop_event.wait(self.check_interval)
                 
+    def stop(self):
+        """Stop the monitoring loop without waiting for the current sleep to expire"""
+        self.running = False
+        self._stop_event.set()
+        try:
+            self._notify_queue.put_nowait(None)  # Worker exits once the queued notifications are sent
+        except queue.Full:
+            pass
+        
     def run(self):
         """Main run method"""
         logging.info("Starting Tailscale Monitor Service")
         
+        # Before any thread is started: affinity and niceness are per-thread on Linux and only inherited at creation
+        self.apply_cpu_placement()
+        self._notify_thread.start()
+        
         # Load previous state
         self.load_state()
         
@@ -416,15 +608,24 @@ class TailscaleMonitor:
             self.monitor_loop()
         except KeyboardInterrupt:
             logging.info("Shutting down Tailscale Monitor Service")
-            self.running = False
+            self.stop()
+            
+        # Give pending notifications a chance to go out before exiting
+        self._notify_thread.join(timeout=10)
             
+monitor = None
+
 def signal_handler(signum, frame):
     """Handle shutdown signals"""
     logging.info(f"Received signal {signum}, shutting down...")
-    sys.exit(0)
+    if monitor is None:
+        sys.exit(0)
+    # Let the monitor loop finish its current pass and return normally
+    monitor.stop()
     
 def main():
     """Main function"""
+    global monitor
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
     
@@ -10,30 +10,100 @@ Optimized for 24/7 operation with minimal resource usage.
 
 import os
 import sys
+import math
 import time
 import json
 import logging
-import requests
 import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import signal
+import socket
+import select
+import errno
+import ipaddress
+import secrets
 import subprocess
-import psutil
+from collections import OrderedDict
 from datetime import datetime, timezone
 from configparser import ConfigParser
 from typing import Dict, Optional, List
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Configuration
 CONFIG_PATH = "/opt/gateway/config/telegram.conf"
 LOG_PATH = "/var/log/telegram_notifier.log"
 STATE_FILE = "/tmp/telegram_notifier_state.json"
+BATCH_SEPARATOR = "\n\n---\n\n"
+JSON_HEADERS = {'Content-Type': 'application/json'}
+MAX_SEND_ATTEMPTS = 3  # sendMessage tries for one message when Telegram asks us to slow down
+TIMEOUT_RETRY_DELAY = 5  # Seconds before resending a message whose request timed out (once)
+MAX_MESSAGE_LENGTH = 4096  # Telegram sendMessage text limit
+MAX_THROTTLE_KEYS = 256  # Event types remembered by should_notify (least recently notified evicted first)
+SYSFS_CPU_TEMP = "/sys/class/thermal/thermal_zone0/temp"
+SYSFS_THROTTLED = "/sys/devices/platform/soc/soc:firmware/get_throttled"
+STATUS_TTL_SECONDS = 10  # /status, /temp and /network replies are reused for this long
+RESTART_TIMEOUT = 30  # Seconds allowed for one 'systemctl restart'
+INTERNET_PROBE = ('8.8.8.8', 53)  # Public DNS over TCP: a handshake proves outbound connectivity
+UPDATES_LIMIT = 100  # Telegram's maximum per getUpdates call
+ALLOWED_UPDATES = json.dumps(['message'])  # Edits, channel posts, callbacks... are filtered server-side
+WEBHOOK_SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+# One journalctl / systemctl call covers every unit (both accept repeated unit arguments)
+LOG_SERVICES = ('access_control.service', 'network-monitor.service', 'tailscale.service')
+HEALTH_SERVICES = ('access_control.service', 'network-monitor.service')
+RECENT_LOGS_ARGV = ('journalctl', *(arg for service in LOG_SERVICES for arg in ('-u', service)),
+                    '--since', '1 hour ago', '--no-pager', '-n', '10', '--output', 'short', '--no-hostname', '-q')
+IS_ACTIVE_ARGV = ('systemctl', 'is-active', *HEALTH_SERVICES)
+
+# Notification messages (Markdown), filled with a single str.format call each
+TPL_CONNECT = "🟢 *Gateway Conectado*\n\n📍 IP asignada: `{ip}`\n🔧 Modo: *{mode}*\n⏰ {ts}"
+TPL_DISCONNECT = "🔴 *Desconexión Detectada*\n\n🌐 Tipo: *{connection_type}*\n⏰ {ts}"
+TPL_TAILSCALE_ACCESS = "👤 *Acceso Tailscale*\n\n👥 Usuario: *{user}*\n🔄 Acción: *{action}*\n⏰ {ts}"
+TPL_HIGH_CPU = ("⚠️ *CPU Alto ({cpu_percent:.1f}%)*\n\n🔥 Temperatura: {temp}°C\n"
+                "💾 Memoria: {memory}%\n💿 Disco: {disk}%\n⏰ {ts}")
+TPL_CRITICAL = "🚨 *Evento Crítico*\n\n📋 Tipo: *{event_type}*\n📝 Detalles: {details}\n⏰ {ts}"
+TPL_MODE_CHANGE = "🔄 *Cambio de Modo*\n\n📤 Anterior: *{old_mode}*\n📥 Nuevo: *{new_mode}*\n⏰ {ts}"
+
+# Bot command (first word) -> handler(notifier, remaining words)
+BOT_COMMANDS = {
+    '/status': lambda notifier, args: notifier.cached_reply('/status', notifier.get_system_status),
+    '/users': lambda notifier, args: notifier.get_tailscale_users(),
+    '/logs': lambda notifier, args: notifier.get_recent_logs(),
+    '/health': lambda notifier, args: notifier.get_health_diagnostics(),
+    '/temp': lambda notifier, args: notifier.cached_reply('/temp', notifier.get_temperature_info),
+    '/network': lambda notifier, args: notifier.cached_reply('/network', notifier.get_network_info),
+    '/restart': lambda notifier, args: notifier.restart_service(args[-1] if args else 'all')
+}
+
+_ts_cache = (0, '')  # (epoch second, formatted), swapped as a whole so threads never see a torn pair
+
+def _now_str() -> str:
+    """Local time as shown at the bottom of every message, formatted once per second"""
+    global _ts_cache
+    second = int(time.time())
+    if second != _ts_cache[0]:
+        _ts_cache = (second, datetime.fromtimestamp(second).strftime('%Y-%m-%d %H:%M:%S'))
+    return _ts_cache[1]
+    
 
 class TelegramNotifier:
     def __init__(self):
         self.config = self.load_config()
-        self.bot_token = self.config.get('BOT_TOKEN')
-        self.chat_id = self.config.get('CHAT_ID')
+        self.apply_config()
         self.running = True
-        self.last_notifications = {}
+        self.last_notifications = OrderedDict()  # event type -> monotonic time of its last notification
+        self.session = self.create_session()
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._flush_timer = None
+        self._reply_cache = {}  # command -> (monotonic time, reply text)
         self.setup_logging()
         
     def load_config(self) -> Dict:
@@ -63,6 +133,42 @@ class TelegramNotifier:
             }
         return config
         
+    def create_session(self) -> requests.Session:
+        """One pooled HTTPS session so every API call reuses the kept-alive TLS connection"""
+        session = requests.Session()
+        # read=False: a long-poll read timeout surfaces as requests' Timeout instead of being retried
+        retries = Retry(total=3, read=False, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=retries))
+        return session
+        
+    def apply_config(self):
+        """Bind the settings read on every notification to attributes"""
+        self.bot_token = self.config.get('BOT_TOKEN')
+        self.chat_id = self.config.get('CHAT_ID')
+        self.notify_connection_enabled = bool(self.config.get('NOTIFY_CONNECTION', True))
+        self.notify_disconnection_enabled = bool(self.config.get('NOTIFY_DISCONNECTION', True))
+        self.notify_tailscale_access_enabled = bool(self.config.get('NOTIFY_TAILSCALE_ACCESS', True))
+        self.notify_cpu_high_enabled = bool(self.config.get('NOTIFY_CPU_HIGH', True))
+        self.notify_critical_events_enabled = bool(self.config.get('NOTIFY_CRITICAL_EVENTS', True))
+        self.notify_mode_changes_enabled = bool(self.config.get('NOTIFY_MODE_CHANGES', True))
+        self.cpu_threshold = float(self.config.get('CPU_THRESHOLD', 70))
+        self.min_notification_interval = float(self.config.get('MIN_NOTIFICATION_INTERVAL', 60))
+        # Notifications raised within batch_window seconds of each other go out as one message
+        self.batch_window = self.get_batch_window()
+        self.webhook_url = self.config.get('WEBHOOK_URL') or None
+        self.webhook_listen = str(self.config.get('WEBHOOK_LISTEN', '127.0.0.1'))
+        self.webhook_port = int(self.config.get('WEBHOOK_PORT', 8443))
+        
+    def get_batch_window(self) -> float:
+        """BATCH_WINDOW_MS from config as seconds, clamped to 0-5000 ms (0 disables batching)"""
+        try:
+            window_ms = float(self.config.get('BATCH_WINDOW_MS', 400))
+        except (TypeError, ValueError):
+            window_ms = 400.0
+        if not math.isfinite(window_ms):
+            window_ms = 400.0
+        return min(max(window_ms, 0.0), 5000.0) / 1000
+        
     def setup_logging(self):
         """Setup logging configuration"""
         logging.basicConfig(
@@ -74,8 +180,8 @@ class TelegramNotifier:
             ]
         )
         
-    def send_message(self, message: str, parse_mode: str = 'Markdown') -> bool:
-        """Send message to Telegram chat"""
+    def send_message(self, message: str, parse_mode: str = 'Markdown', attempt: int = 1) -> bool:
+        """Send message to Telegram chat (rescheduled when rate limited or timed out)"""
         try:
             url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
             payload = {
@@ -84,133 +190,245 @@ class TelegramNotifier:
                 'parse_mode': parse_mode
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            if ORJSON_AVAILABLE:
+                response = self.session.post(url, data=orjson.dumps(payload), headers=JSON_HEADERS, timeout=10)
+            else:
+                response = self.session.post(url, json=payload, timeout=10)
+                
+            # Flood control: Telegram says how long to wait in parameters.retry_after
+            if response.status_code == 429:
+                try:
+                    retry_after = int(response.json().get('parameters', {}).get('retry_after', 1))
+                except (ValueError, AttributeError):
+                    retry_after = 1
+                if attempt < MAX_SEND_ATTEMPTS:
+                    logging.warning(f"Rate limited by Telegram, resending in {retry_after}s")
+                    self._send_later(retry_after, message, parse_mode, attempt + 1)
+                else:
+                    logging.error(f"Rate limited by Telegram, dropping message: {message[:50]}...")
+                return False
             response.raise_for_status()
             
             logging.info(f"Message sent successfully: {message[:50]}...")
             return True
             
+        except requests.exceptions.Timeout as e:
+            logging.error(f"Failed to send message: {e}")
+            if attempt == 1:
+                self._send_later(TIMEOUT_RETRY_DELAY, message, parse_mode, attempt + 1)
+            return False
         except Exception as e:
             logging.error(f"Failed to send message: {e}")
             return False
             
+    def _send_later(self, delay: float, message: str, parse_mode: str, attempt: int):
+        """Resend a message after delay seconds without blocking the caller"""
+        # Daemon: a pending resend must not hold the process open at shutdown
+        timer = threading.Timer(delay, self.send_message, args=(message, parse_mode, attempt))
+        timer.daemon = True
+        timer.start()
+            
+    def _enqueue(self, message: str):
+        """Queue a notification and arm the flush timer if this opens a new batch"""
+        if self.batch_window <= 0:
+            self.send_message(message)
+            return
+        with self._pending_lock:
+            self._pending.append(message)
+            if self._flush_timer is None:
+                # Not a daemon: a notification raised right before exit is still delivered
+                self._flush_timer = threading.Timer(self.batch_window, self._flush)
+                self._flush_timer.start()
+                
+    def _flush(self):
+        """Send the pending notifications joined into as few messages as the length limit allows"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+            self._flush_timer = None
+            
+        # Identical notifications queued in the same window are sent once (first occurrence order kept)
+        # Only matters when MIN_NOTIFICATION_INTERVAL is shorter than the batch window: otherwise should_notify
+        # already holds back same-type repeats, and texts carry a per-second timestamp, so they rarely collide
+        pending = list(dict.fromkeys(pending))
+        
+        batch = []
+        length = 0
+        for message in pending:
+            added = len(message) + (len(BATCH_SEPARATOR) if batch else 0)
+            if batch and length + added > MAX_MESSAGE_LENGTH:
+                self.send_message(BATCH_SEPARATOR.join(batch))
+                batch, length = [], 0
+                added = len(message)
+            batch.append(message)
+            length += added
+        if batch:
+            self.send_message(BATCH_SEPARATOR.join(batch))
+            
     def should_notify(self, event_type: str) -> bool:
         """Check if enough time has passed since last notification of this type"""
-        now = time.time()
-        last_time = self.last_notifications.get(event_type, 0)
-        interval = self.config.get('MIN_NOTIFICATION_INTERVAL', 60)
-        
-        if now - last_time >= interval:
+        # Monotonic clock: NTP steps or a wrong RTC at boot cannot mute or repeat notifications
+        now = time.monotonic()
+        last_time = self.last_notifications.get(event_type)
+        if last_time is None or now - last_time >= self.min_notification_interval:
             self.last_notifications[event_type] = now
+            self.last_notifications.move_to_end(event_type)
+            # Per-user and per-event keys would otherwise accumulate for the life of the service
+            while len(self.last_notifications) > MAX_THROTTLE_KEYS:
+                self.last_notifications.popitem(last=False)
             return True
         return False
         
     def notify_connection_established(self, ip: str, mode: str):
         """Notify when connection is established"""
-        if not self.config.get('NOTIFY_CONNECTION', True):
+        if not self.notify_connection_enabled:
             return
             
         if self.should_notify('connection'):
-            message = f"🟢 *Gateway Conectado*\n\n"
-            message += f"📍 IP asignada: `{ip}`\n"
-            message += f"🔧 Modo: *{mode}*\n"
-            message += f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            self.send_message(message)
+            message = TPL_CONNECT.format(ip=ip, mode=mode, ts=_now_str())
+            self._enqueue(message)
             
     def notify_disconnection(self, connection_type: str):
         """Notify when disconnection is detected"""
-        if not self.config.get('NOTIFY_DISCONNECTION', True):
+        if not self.notify_disconnection_enabled:
             return
             
         if self.should_notify('disconnection'):
-            message = f"🔴 *Desconexión Detectada*\n\n"
-            message += f"🌐 Tipo: *{connection_type}*\n"
-            message += f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            self.send_message(message)
+            message = TPL_DISCONNECT.format(connection_type=connection_type, ts=_now_str())
+            self._enqueue(message)
             
     def notify_tailscale_access(self, user: str, action: str):
         """Notify Tailscale user access"""
-        if not self.config.get('NOTIFY_TAILSCALE_ACCESS', True):
+        if not self.notify_tailscale_access_enabled:
             return
             
         if self.should_notify(f'tailscale_{user}'):
-            message = f"👤 *Acceso Tailscale*\n\n"
-            message += f"👥 Usuario: *{user}*\n"
-            message += f"🔄 Acción: *{action}*\n"
-            message += f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            self.send_message(message)
+            message = TPL_TAILSCALE_ACCESS.format(user=user, action=action, ts=_now_str())
+            self._enqueue(message)
             
     def notify_high_cpu(self, cpu_percent: float, stats: Dict):
         """Notify high CPU usage"""
-        if not self.config.get('NOTIFY_CPU_HIGH', True):
+        if not self.notify_cpu_high_enabled:
             return
             
-        threshold = self.config.get('CPU_THRESHOLD', 70)
-        if cpu_percent > threshold and self.should_notify('high_cpu'):
-            message = f"⚠️ *CPU Alto ({cpu_percent:.1f}%)*\n\n"
-            message += f"🔥 Temperatura: {stats.get('temp', 'N/A')}°C\n"
-            message += f"💾 Memoria: {stats.get('memory', 'N/A')}%\n"
-            message += f"💿 Disco: {stats.get('disk', 'N/A')}%\n"
-            message += f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            self.send_message(message)
+        if cpu_percent > self.cpu_threshold and self.should_notify('high_cpu'):
+            message = TPL_HIGH_CPU.format(cpu_percent=cpu_percent, temp=stats.get('temp', 'N/A'),
+                                          memory=stats.get('memory', 'N/A'), disk=stats.get('disk', 'N/A'),
+                                          ts=_now_str())
+            self._enqueue(message)
             
     def notify_critical_event(self, event_type: str, details: str):
         """Notify critical system events"""
-        if not self.config.get('NOTIFY_CRITICAL_EVENTS', True):
+        if not self.notify_critical_events_enabled:
             return
             
         if self.should_notify(f'critical_{event_type}'):
-            message = f"🚨 *Evento Crítico*\n\n"
-            message += f"📋 Tipo: *{event_type}*\n"
-            message += f"📝 Detalles: {details}\n"
-            message += f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            self.send_message(message)
+            message = TPL_CRITICAL.format(event_type=event_type, details=details, ts=_now_str())
+            self._enqueue(message)
             
     def notify_mode_change(self, old_mode: str, new_mode: str):
         """Notify network mode changes"""
-        if not self.config.get('NOTIFY_MODE_CHANGES', True):
+        if not self.notify_mode_changes_enabled:
             return
             
         if self.should_notify('mode_change'):
-            message = f"🔄 *Cambio de Modo*\n\n"
-            message += f"📤 Anterior: *{old_mode}*\n"
-            message += f"📥 Nuevo: *{new_mode}*\n"
-            message += f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            self.send_message(message)
+            message = TPL_MODE_CHANGE.format(old_mode=old_mode, new_mode=new_mode, ts=_now_str())
+            self._enqueue(message)
+            
+    def cached_reply(self, command: str, build) -> str:
+        """Reply built at most once per STATUS_TTL_SECONDS for the same command"""
+        now = time.monotonic()
+        cached = self._reply_cache.get(command)
+        if cached and now - cached[0] < STATUS_TTL_SECONDS:
+            return cached[1]
+        reply = build()
+        self._reply_cache[command] = (now, reply)
+        return reply
+        
+    def read_sysfs(self, path: str) -> Optional[str]:
+        """Contents of a sysfs attribute, None when it does not exist"""
+        try:
+            with open(path) as f:
+                return f.read().strip()
+        except (OSError, ValueError):
+            return None
+            
+    def get_cpu_temperature(self) -> str:
+        """CPU temperature in degrees C as text, 'N/A' when unavailable"""
+        # Thermal zone first (plain file read)
+        temp_millidegrees = self.read_sysfs(SYSFS_CPU_TEMP)
+        if temp_millidegrees:
+            try:
+                return f"{int(temp_millidegrees) / 1000:.1f}"
+            except ValueError:
+                pass
+                
+        # Alternative method using vcgencmd
+        try:
+            result = subprocess.run(['vcgencmd', 'measure_temp'], 
+                                  capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                return result.stdout.strip().replace('temp=', '').replace("'C", '')
+        except:
+            pass
             
+        return "N/A"
+        
+    def get_throttled(self) -> Optional[str]:
+        """get_throttled bit mask as hex text, None when unavailable"""
+        # Firmware sysfs attribute when exposed, vcgencmd otherwise
+        throttled = self.read_sysfs(SYSFS_THROTTLED)
+        if throttled:
+            return f"0x{int(throttled, 16):x}"
+        try:
+            result = subprocess.run(['vcgencmd', 'get_throttled'], 
+                                  capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                return result.stdout.strip().replace('throttled=', '')
+        except:
+            pass
+        return None
+        
+    def get_ipv4_addresses(self, interface: str) -> List[str]:
+        """IPv4 addresses of an interface in CIDR notation (as 'ip addr' shows them)"""
+        import psutil  # Deferred: not loaded until the first command that reports system data
+        addresses = []
+        for addr in psutil.net_if_addrs().get(interface, []):
+            if addr.family == socket.AF_INET:
+                prefix = ipaddress.IPv4Network(f"0.0.0.0/{addr.netmask}").prefixlen if addr.netmask else 32
+                addresses.append(f"{addr.address}/{prefix}")
+        return addresses
+        
+    def get_primary_ip(self) -> str:
+        """First non-loopback IPv4 address (what 'hostname -I' lists first)"""
+        import psutil
+        for addrs in psutil.net_if_addrs().values():
+            for addr in addrs:
+                if addr.family == socket.AF_INET and not addr.address.startswith('127.'):
+                    return addr.address
+        return "N/A"
+        
+    def format_uptime(self, seconds: float) -> str:
+        """Uptime in the 'uptime -p' style: up 1 week, 2 days, 3 hours, 4 minutes"""
+        minutes = int(seconds) // 60
+        parts = []
+        for unit, size in (('week', 10080), ('day', 1440), ('hour', 60), ('minute', 1)):
+            count, minutes = divmod(minutes, size)
+            if count:
+                parts.append(f"{count} {unit}{'s' if count != 1 else ''}")
+        return "up " + ", ".join(parts or ["0 minutes"])
+        
     def get_system_status(self) -> str:
         """Get comprehensive system status"""
+        import psutil
         try:
             # System metrics
             cpu_percent = psutil.cpu_percent(interval=1)
             memory = psutil.virtual_memory()
             disk = psutil.disk_usage('/')
             
-            # Temperature
-            temp = "N/A"
-            try:
-                result = subprocess.run(['vcgencmd', 'measure_temp'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    temp = result.stdout.strip().replace('temp=', '').replace("'C", '')
-            except:
-                pass
-            
-            # Network info
-            try:
-                ip_result = subprocess.run(['hostname', '-I'], 
-                                         capture_output=True, text=True, timeout=5)
-                ip_addr = ip_result.stdout.strip().split()[0] if ip_result.returncode == 0 else "N/A"
-            except:
-                ip_addr = "N/A"
-            
-            # Uptime
-            try:
-                uptime = subprocess.run(['uptime', '-p'], 
-                                      capture_output=True, text=True, timeout=5)
-                uptime_str = uptime.stdout.strip() if uptime.returncode == 0 else "N/A"
-            except:
-                uptime_str = "N/A"
+            temp = self.get_cpu_temperature()
+            ip_addr = self.get_primary_ip()
+            uptime_str = self.format_uptime(time.time() - psutil.boot_time())
             
             message = f"📊 *Estado del Sistema*\n\n"
             message += f"🖥️ CPU: {cpu_percent:.1f}%\n"
@@ -219,7 +437,7 @@ class TelegramNotifier:
             message += f"🌡️ Temperatura: {temp}°C\n"
             message += f"🌐 IP: `{ip_addr}`\n"
             message += f"⏱️ Uptime: {uptime_str}\n"
-            message += f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            message += f"⏰ {_now_str()}"
             
             return message
             
@@ -228,33 +446,13 @@ class TelegramNotifier:
             
     def handle_bot_command(self, command: str) -> str:
         """Handle incoming bot commands"""
-        command = command.lower().strip()
-        
-        if command == '/status':
-            return self.get_system_status()
-            
-        elif command == '/users':
-            return self.get_tailscale_users()
-            
-        elif command == '/logs':
-            return self.get_recent_logs()
-            
-        elif command == '/health':
-            return self.get_health_diagnostics()
-            
-        elif command == '/temp':
-            return self.get_temperature_info()
-            
-        elif command == '/network':
-            return self.get_network_info()
-            
-        elif command.startswith('/restart'):
-            service = command.split()[-1] if len(command.split()) > 1 else 'all'
-            return self.restart_service(service)
-            
-        else:
+        parts = command.lower().split()
+        if not parts:
             return self.get_help_message()
-            
+        # In group chats Telegram appends the bot name: /status@MyBot
+        handler = BOT_COMMANDS.get(parts[0].split('@', 1)[0])
+        return handler(self, parts[1:]) if handler else self.get_help_message()
+        
     def get_tailscale_users(self) -> str:
         """Get currently connected Tailscale users"""
         try:
@@ -287,24 +485,18 @@ class TelegramNotifier:
         try:
             logs = []
             
-            # Get systemd logs for key services
-            services = ['access_control.service', 'network-monitor.service', 'tailscale.service']
-            
-            for service in services:
-                try:
-                    result = subprocess.run([
-                        'journalctl', '-u', service, '--since', '1 hour ago', 
-                        '--no-pager', '-n', '3', '--output', 'short'
-                    ], capture_output=True, text=True, timeout=10)
-                    
-                    if result.returncode == 0 and result.stdout.strip():
-                        logs.extend(result.stdout.strip().split('\n')[-2:])
-                except:
-                    continue
+            # Get systemd logs for key services (merged, newest last); journalctl already keeps only the last 10,
+            # -q drops the '-- No entries --' style notices and --no-hostname leaves more of each line for the message
+            try:
+                result = subprocess.run(RECENT_LOGS_ARGV, capture_output=True, text=True, timeout=10)
+                if result.returncode == 0:
+                    logs = result.stdout.splitlines()
+            except:
+                pass
             
             if logs:
                 message = f"📝 *Eventos Recientes*\n\n"
-                for log in logs[-10:]:  # Last 10 events
+                for log in logs:
                     if log.strip():
                         # Truncate long log lines
                         log_short = log[:80] + "..." if len(log) > 80 else log
@@ -319,6 +511,7 @@ class TelegramNotifier:
         
     def get_health_diagnostics(self) -> str:
         """Get comprehensive health diagnostics"""
+        import psutil
         try:
             # System load
             load1, load5, load15 = psutil.getloadavg()
@@ -336,14 +529,12 @@ class TelegramNotifier:
             services_ok = 0
             services_total = 3
             
-            for service in ['access_control.service', 'network-monitor.service']:
-                try:
-                    result = subprocess.run(['systemctl', 'is-active', service], 
-                                          capture_output=True, text=True, timeout=5)
-                    if result.stdout.strip() == 'active':
-                        services_ok += 1
-                except:
-                    pass
+            try:
+                # Exit status is non-zero when any unit is inactive; count the per-unit lines instead
+                result = subprocess.run(IS_ACTIVE_ARGV, capture_output=True, text=True, timeout=5)
+                services_ok = result.stdout.split().count('active')
+            except:
+                pass
             
             message = f"🏥 *Diagnóstico Completo*\n\n"
             message += f"📈 Load: {load1:.2f}, {load5:.2f}, {load15:.2f}\n"
@@ -351,7 +542,7 @@ class TelegramNotifier:
             message += f"📊 Servicios: {services_ok}/{services_total} OK\n"
             message += f"💿 Disco I/O: {disk_io.read_count}/{disk_io.write_count}\n"
             message += f"🌐 Red: ↓{net_io.bytes_recv // 1024 // 1024}MB ↑{net_io.bytes_sent // 1024 // 1024}MB\n"
-            message += f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            message += f"⏰ {_now_str()}"
             
         except Exception as e:
             message = f"❌ Error en diagnóstico: {str(e)}"
@@ -362,24 +553,14 @@ class TelegramNotifier:
         """Get temperature information and history"""
         try:
             # Current temperature
-            temp = "N/A"
-            try:
-                result = subprocess.run(['vcgencmd', 'measure_temp'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    temp = result.stdout.strip().replace('temp=', '').replace("'C", '')
-            except:
-                pass
+            temp = self.get_cpu_temperature()
             
             # Throttling status
             throttle_status = "N/A"
             try:
-                result = subprocess.run(['vcgencmd', 'get_throttled'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    throttle_hex = result.stdout.strip().replace('throttled=', '')
-                    throttle_int = int(throttle_hex, 16)
-                    throttle_status = "Normal" if throttle_int == 0 else f"Throttled ({throttle_hex})"
+                throttle_hex = self.get_throttled()
+                if throttle_hex is not None:
+                    throttle_status = "Normal" if int(throttle_hex, 16) == 0 else f"Throttled ({throttle_hex})"
             except:
                 pass
             
@@ -399,76 +580,144 @@ class TelegramNotifier:
             except:
                 pass
             
-            message += f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            message += f"⏰ {_now_str()}"
             
         except Exception as e:
             message = f"❌ Error obteniendo temperatura: {str(e)}"
             
         return message
         
+    def start_probe(self, argv: List[str]) -> Optional[subprocess.Popen]:
+        """Start a probe command without waiting for it; None if it cannot be executed"""
+        try:
+            return subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        except OSError:
+            return None
+            
+    def finish_probe(self, proc: Optional[subprocess.Popen], deadline: float) -> Optional[tuple]:
+        """(returncode, stdout) of a started probe, None if it did not start or missed the deadline"""
+        if proc is None:
+            return None
+        try:
+            stdout, _ = proc.communicate(timeout=max(deadline - time.monotonic(), 0))
+            return proc.returncode, stdout
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            return None
+            
+    def start_connect_probe(self, address: tuple) -> Optional[socket.socket]:
+        """Start a non-blocking TCP connect without waiting for it; None if it fails immediately"""
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        except OSError:
+            return None
+        sock.setblocking(False)
+        if sock.connect_ex(address) not in (0, errno.EINPROGRESS):
+            sock.close()
+            return None
+        return sock
+        
+    def finish_connect_probe(self, sock: Optional[socket.socket], deadline: float) -> bool:
+        """True if a started connect completed successfully before the deadline; the socket is closed"""
+        if sock is None:
+            return False
+        try:
+            _, writable, _ = select.select([], [sock], [], max(deadline - time.monotonic(), 0))
+            return bool(writable) and sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+        except OSError:
+            return False
+        finally:
+            sock.close()
+            
+    def check_internet_connection(self, timeout: float = 3) -> bool:
+        """True if a TCP connection to INTERNET_PROBE can be opened"""
+        return self.finish_connect_probe(self.start_connect_probe(INTERNET_PROBE), time.monotonic() + timeout)
+            
     def get_network_info(self) -> str:
         """Get network connection information"""
+        import psutil
         try:
             message = f"🌐 *Estado de Red*\n\n"
             
+            # The external probes run concurrently: the reply takes as long as the slowest one, not their sum
+            started = time.monotonic()
+            wifi_proc = self.start_probe(['iwgetid', '-r'])
+            # Internet test: one TCP handshake instead of forking ping, started now and read after the other probes
+            internet_sock = self.start_connect_probe(INTERNET_PROBE)
+            # Tailscale: addresses of the tailscale0 interface, the CLI only when it is absent
+            try:
+                ts_addrs = [addr.address for addr in psutil.net_if_addrs().get('tailscale0', [])
+                            if addr.family in (socket.AF_INET, socket.AF_INET6)]
+            except:
+                ts_addrs = []
+            ts_proc = None if ts_addrs else self.start_probe(['tailscale', 'ip'])
+            
             # Ethernet status
             try:
-                result = subprocess.run(['ip', 'addr', 'show', 'eth0'], 
-                                      capture_output=True, text=True, timeout=5)
-                if 'UP' in result.stdout:
-                    eth_ip = "Disconnected"
-                    for line in result.stdout.split('\n'):
-                        if 'inet ' in line and not '127.0.0.1' in line:
-                            eth_ip = line.strip().split()[1]
-                            break
-                    message += f"🔌 Ethernet: {eth_ip}\n"
+                eth_stats = psutil.net_if_stats().get('eth0')
+                if eth_stats and eth_stats.isup:
+                    eth_ips = self.get_ipv4_addresses('eth0')
+                    message += f"🔌 Ethernet: {eth_ips[0] if eth_ips else 'Disconnected'}\n"
                 else:
                     message += f"🔌 Ethernet: Down\n"
             except:
                 message += f"🔌 Ethernet: Error\n"
             
             # WiFi status
-            try:
-                result = subprocess.run(['iwgetid', '-r'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0 and result.stdout.strip():
-                    ssid = result.stdout.strip()
-                    message += f"📶 WiFi: {ssid}\n"
-                else:
-                    message += f"📶 WiFi: Disconnected\n"
-            except:
+            result = self.finish_probe(wifi_proc, started + 5)
+            if result is None:
                 message += f"📶 WiFi: Error\n"
+            elif result[0] == 0 and result[1].strip():
+                ssid = result[1].strip()
+                message += f"📶 WiFi: {ssid}\n"
+            else:
+                message += f"📶 WiFi: Disconnected\n"
             
             # Tailscale status
-            try:
-                result = subprocess.run(['tailscale', 'ip'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0 and result.stdout.strip():
-                    ts_ip = result.stdout.strip()
-                    message += f"🔒 Tailscale: {ts_ip}\n"
-                else:
-                    message += f"🔒 Tailscale: Disconnected\n"
-            except:
+            if not ts_addrs:
+                result = self.finish_probe(ts_proc, started + 5)
+                if result is None:
+                    ts_addrs = None
+                elif result[0] == 0:
+                    ts_addrs = result[1].split()
+            if ts_addrs:
+                ts_ip = '\n'.join(ts_addrs)
+                message += f"🔒 Tailscale: {ts_ip}\n"
+            elif ts_addrs is None:
                 message += f"🔒 Tailscale: Not installed\n"
+            else:
+                message += f"🔒 Tailscale: Disconnected\n"
             
-            # Ping test
-            try:
-                result = subprocess.run(['ping', '-c', '1', '-W', '3', '8.8.8.8'], 
-                                      capture_output=True, text=True, timeout=10)
-                if result.returncode == 0:
-                    message += f"🌍 Internet: ✅ Connected\n"
-                else:
-                    message += f"🌍 Internet: ❌ No connection\n"
-            except:
-                message += f"🌍 Internet: ❌ Error testing\n"
+            # Internet test
+            if self.finish_connect_probe(internet_sock, started + 3):
+                message += f"🌍 Internet: ✅ Connected\n"
+            else:
+                message += f"🌍 Internet: ❌ No connection\n"
             
-            message += f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            message += f"⏰ {_now_str()}"
             
         except Exception as e:
             message = f"❌ Error obteniendo info de red: {str(e)}"
             
         return message
         
+    def systemctl_restart(self, unit: str):
+        """'systemctl restart unit' in its own session; the whole process group is killed on timeout"""
+        # subprocess.run would only kill systemctl itself and leave anything it spawned behind
+        proc = subprocess.Popen(['systemctl', 'restart', unit], start_new_session=True)
+        try:
+            returncode = proc.wait(timeout=RESTART_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            proc.wait()
+            raise
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, proc.args)
+            
     def restart_service(self, service: str) -> str:
         """Restart specified service remotely"""
         try:
@@ -477,8 +726,7 @@ class TelegramNotifier:
                 results = []
                 for svc in services:
                     try:
-                        subprocess.run(['systemctl', 'restart', svc], 
-                                     timeout=30, check=True)
+                        self.systemctl_restart(svc)
                         results.append(f"✅ {svc}")
                     except:
                         results.append(f"❌ {svc}")
@@ -491,8 +739,7 @@ class TelegramNotifier:
                 valid_services = ['access_control.service', 'network-monitor.service', 'tailscale.service']
                 if f"{service}.service" in valid_services or service in valid_services:
                     service_name = service if service.endswith('.service') else f"{service}.service"
-                    subprocess.run(['systemctl', 'restart', service_name], 
-                                 timeout=30, check=True)
+                    self.systemctl_restart(service_name)
                     message = f"✅ Servicio {service_name} reiniciado"
                 else:
                     message = f"❌ Servicio no válido: {service}"
@@ -521,32 +768,96 @@ class TelegramNotifier:
         
         return message
         
+    def process_update(self, update: Dict):
+        """Answer a bot command from the configured chat; other updates are ignored"""
+        message = update.get('message')
+        if not message or 'text' not in message:
+            return
+            
+        # Only respond to messages from configured chat
+        if str(message['chat']['id']) == str(self.chat_id):
+            response_text = self.handle_bot_command(message['text'])
+            self.send_message(response_text)
+            
+    def set_webhook(self, url: str, secret: str) -> bool:
+        """Register the webhook URL with Telegram"""
+        try:
+            response = self.session.post(f"https://api.telegram.org/bot{self.bot_token}/setWebhook",
+                                         data={'url': url, 'secret_token': secret,
+                                               'allowed_updates': ALLOWED_UPDATES}, timeout=10)
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            logging.error(f"Failed to set webhook: {e}")
+            return False
+            
+    def start_webhook_listener(self) -> bool:
+        """Serve Telegram webhook calls until shutdown; False if the webhook could not be registered"""
+        from http.server import HTTPServer, BaseHTTPRequestHandler  # Only needed in webhook mode
+        
+        # Telegram echoes the secret in a header on every call, so the endpoint needs no token in its path
+        secret = secrets.token_urlsafe(32)
+        if not self.set_webhook(self.webhook_url, secret):
+            return False
+            
+        notifier = self
+        
+        class WebhookHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.headers.get(WEBHOOK_SECRET_HEADER) != secret:
+                    self.send_error(403)
+                    return
+                try:
+                    body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                    update = orjson.loads(body) if ORJSON_AVAILABLE else json.loads(body)
+                except ValueError:
+                    self.send_error(400)
+                    return
+                # Acknowledge first: Telegram redelivers updates whose call is still pending when it times out
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                self.wfile.flush()
+                try:
+                    notifier.process_update(update)
+                except Exception as e:
+                    logging.error(f"Webhook update error: {e}")
+                    
+            def log_message(self, format, *args):
+                pass
+                
+        server = HTTPServer((self.webhook_listen, self.webhook_port), WebhookHandler)
+        logging.info(f"Webhook listening on {self.webhook_listen}:{self.webhook_port} for {self.webhook_url}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+        return True
+        
     def start_bot_listener(self):
         """Start listening for bot commands (basic polling)"""
         offset = 0
+        url = f"https://api.telegram.org/bot{self.bot_token}/getUpdates"
         
+        # getUpdates is refused while a webhook is registered (e.g. left over from webhook mode)
+        try:
+            self.session.post(f"https://api.telegram.org/bot{self.bot_token}/deleteWebhook", timeout=10)
+        except Exception as e:
+            logging.warning(f"Could not delete webhook: {e}")
+            
         while self.running:
             try:
-                url = f"https://api.telegram.org/bot{self.bot_token}/getUpdates"
-                params = {'offset': offset, 'timeout': 30}
+                params = {'offset': offset, 'timeout': 30, 'limit': UPDATES_LIMIT, 'allowed_updates': ALLOWED_UPDATES}
                 
-                response = requests.get(url, params=params, timeout=35)
+                response = self.session.get(url, params=params, timeout=35)
                 response.raise_for_status()
                 
-                data = response.json()
+                data = orjson.loads(response.content) if ORJSON_AVAILABLE else response.json()
                 
                 if data['ok']:
                     for update in data['result']:
                         offset = update['update_id'] + 1
-                        
-                        if 'message' in update and 'text' in update['message']:
-                            text = update['message']['text']
-                            chat_id = str(update['message']['chat']['id'])
-                            
-                            # Only respond to messages from configured chat
-                            if chat_id == str(self.chat_id):
-                                response_text = self.handle_bot_command(text)
-                                self.send_message(response_text)
+                        self.process_update(update)
                                 
             except requests.exceptions.Timeout:
                 # Expected for long polling
@@ -562,15 +873,13 @@ class TelegramNotifier:
         # Send startup notification
         self.send_message("🟢 *Gateway Sistema 24/7*\n\nServicio de notificaciones iniciado correctamente")
         
-        # Start bot listener in separate thread
-        bot_thread = threading.Thread(target=self.start_bot_listener, daemon=True)
-        bot_thread.start()
-        
-        # Main monitoring loop
+        # The listener is the service's only work: run it on the main thread
+        # instead of a second thread plus a main thread waking every 10 s to keep the process alive
         try:
-            while self.running:
-                time.sleep(10)  # Keep service alive
-                
+            # Webhook when configured (idle until Telegram pushes an update), long polling otherwise
+            if not (self.webhook_url and self.start_webhook_listener()):
+                self.start_bot_listener()
+            
         except KeyboardInterrupt:
             logging.info("Shutting down Telegram Notifier Service")
             self.running = False